@@ -0,0 +1,216 @@
+"""Mede tempo e pico de memória de cada etapa das exportações sobre rios sintéticos.
+
+Para cada escala (total de vértices do Rio + Ilhas) gera um rio com benchmarks/sintetico.py
+e cronometra as funções do poligonal_core. O tempo é a mediana das repetições (sem
+tracemalloc); o pico de memória vem de uma execução à parte com tracemalloc ligado, que
+deixa os laços Python bem mais lentos (desligue com --sem-memoria).
+Etapas com laço Python por vértice são puladas acima de LIMITES (use --sem-limites).
+
+Uso:
+    python benchmarks/bench_etapas.py [--escalas 100,1000,10000,100000,1000000] [--ilhas N]
+                                      [--repeticoes 3] [--sem-memoria] [--json resultado.json]
+    python benchmarks/bench_etapas.py --comparar base.json [novo.json] [--limiar 1.25]
+
+Com --comparar, as etapas que ficaram mais lentas (ou gastaram mais memória) que
+``limiar`` vezes a base são listadas e o script termina com código 1.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np  # noqa: E402
+
+import poligonal_core as core  # noqa: E402
+from sintetico import gerar_rio, ilhas_automaticas  # noqa: E402
+
+ESCALAS = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+# Maior escala (vértices) em que cada etapa roda por padrão
+LIMITES = {
+    "criar_gmsh": 10 ** 5,
+    "salvar_coordenadas": 10 ** 5,
+    "exportar_geodesicas": 10 ** 5,
+}
+
+
+def _todos_pontos(rio, ilhas):
+    return np.concatenate([rio] + ilhas)
+
+
+def _df_coordenadas(rio, ilhas):
+    """DataFrame no formato de salvar_coordenadas (sem gravar o Excel), entrada de criar_gmsh."""
+    import pandas as pd
+
+    tipos = ["Rio"] * len(rio) + [f"Ilha_{i+1}" for i, p in enumerate(ilhas) for _ in range(len(p))]
+    pontos = _todos_pontos(rio, ilhas)
+    return pd.DataFrame({"Tipo": tipos, "Ponto": 0, "Latitude": pontos[:, 0], "Longitude": pontos[:, 1]})
+
+
+def etapas(rio, ilhas):
+    """Lista de (nome, preparar, executar); ``preparar`` roda fora da medição e devolve os argumentos."""
+    lat, lon = _todos_pontos(rio, ilhas).T
+    projecao = core.escolher_projecao(rio)
+
+    def gerar_frio():
+        core._cache_geo.limpar()
+        return ()
+
+    def gerar_quente():
+        core.gerar_gmsh(rio, ilhas)
+        return ()
+
+    return [
+        ("escolher_projecao", lambda: (), lambda: core.escolher_projecao(rio)),
+        ("Projecao.projetar", lambda: (), lambda: projecao.projetar(lat, lon)),
+        ("gerar_gmsh", gerar_frio, lambda: core.gerar_gmsh(rio, ilhas)),
+        ("gerar_gmsh (cache)", gerar_quente, lambda: core.gerar_gmsh(rio, ilhas)),
+        ("criar_gmsh", lambda: (_df_coordenadas(rio, ilhas),), lambda df: core.criar_gmsh(df)),
+        ("salvar_coordenadas", lambda: (), lambda: core.salvar_coordenadas(rio, ilhas)),
+        ("exportar_geodesicas", lambda: (), lambda: core.exportar_geodesicas(rio, ilhas)),
+    ]
+
+
+def medir(preparar, executar, repeticoes, memoria=True):
+    """Retorna (mediana do tempo em s, pico de memória em MiB ou None) de ``executar``."""
+    tempos = []
+    for _ in range(repeticoes):
+        args = preparar()
+        t = time.perf_counter()
+        executar(*args)
+        tempos.append(time.perf_counter() - t)
+        if tempos[-1] > 5.0:  # etapas longas: uma medição basta
+            break
+    if not memoria:
+        return statistics.median(tempos), None
+
+    args = preparar()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        executar(*args)
+        pico = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return statistics.median(tempos), pico / 2 ** 20
+
+
+def _versao(modulo):
+    try:
+        return __import__(modulo).__version__
+    except ImportError:
+        return None
+
+
+def _commit():
+    """Hash do commit atual e se há alterações não commitadas (None fora de um repositório git)."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True)
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                cwd=RAIZ, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit.stdout.strip(), bool(status.stdout.strip())
+
+
+def executar(escalas, n_ilhas, repeticoes, sem_limites, memoria=True):
+    commit, sujo = _commit()
+    resultado = {
+        "commit": commit,
+        "alteracoes_locais": sujo,
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "versoes": {m: _versao(m) for m in ("numpy", "pandas", "xlsxwriter")},
+        "resultados": [],
+    }
+
+    print(f"{'etapa':<22} {'vértices':>10} {'ilhas':>6} {'tempo (ms)':>12} {'pico (MiB)':>11}")
+    for n in escalas:
+        ilhas_n = ilhas_automaticas(n) if n_ilhas is None else n_ilhas
+        rio, ilhas = gerar_rio(n, ilhas_n)
+        n_real = len(rio) + sum(len(p) for p in ilhas)
+        for nome, preparar, funcao in etapas(rio, ilhas):
+            linha = {"etapa": nome, "escala": n, "vertices": n_real, "ilhas": len(ilhas)}
+            if not sem_limites and n > LIMITES.get(nome, n):
+                linha.update(tempo_s=None, pico_mib=None, pulado=True)
+                print(f"{nome:<22} {n_real:>10} {len(ilhas):>6} {'pulado':>12} {'':>11}")
+            else:
+                tempo, pico = medir(preparar, funcao, repeticoes, memoria)
+                linha.update(tempo_s=tempo, pico_mib=pico, pulado=False)
+                pico = "" if pico is None else f"{pico:.1f}"
+                print(f"{nome:<22} {n_real:>10} {len(ilhas):>6} {tempo * 1000:>12.1f} {pico:>11}")
+            resultado["resultados"].append(linha)
+    core._cache_geo.limpar()
+    return resultado
+
+
+def comparar(base, novo, limiar):
+    """Imprime a razão novo/base de tempo e memória por etapa; retorna a lista de regressões."""
+    chave = lambda r: (r["etapa"], r["escala"])  # noqa: E731
+    na_base = {chave(r): r for r in base["resultados"] if not r.get("pulado")}
+    regressoes = []
+
+    print(f"base: {base.get('commit') or '?'}  novo: {novo.get('commit') or '?'}")
+    print(f"{'etapa':<22} {'escala':>10} {'tempo novo/base':>16} {'memória novo/base':>18}")
+    for r in novo["resultados"]:
+        b = na_base.get(chave(r))
+        if b is None or r.get("pulado"):
+            continue
+        razao_t = r["tempo_s"] / b["tempo_s"] if b["tempo_s"] else float("inf")
+        razao_m = r["pico_mib"] / b["pico_mib"] if r["pico_mib"] and b["pico_mib"] else 1.0
+        marca = ""
+        if razao_t > limiar or razao_m > limiar:
+            regressoes.append(chave(r))
+            marca = "  <-- regressão"
+        print(f"{r['etapa']:<22} {r['escala']:>10} {razao_t:>16.2f} {razao_m:>18.2f}{marca}")
+    return regressoes
+
+
+def _ler(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", default=",".join(str(n) for n in ESCALAS),
+                        help="totais de vértices separados por vírgula")
+    parser.add_argument("--ilhas", type=int, help="ilhas por rio (padrão: cresce com a escala)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-limites", action="store_true", help="roda todas as etapas em todas as escalas")
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória (mais rápido)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--comparar", nargs="+", metavar="JSON",
+                        help="base.json [novo.json]; sem novo.json compara com uma execução agora")
+    parser.add_argument("--limiar", type=float, default=1.25)
+    args = parser.parse_args()
+
+    if args.comparar and len(args.comparar) == 2:
+        regressoes = comparar(_ler(args.comparar[0]), _ler(args.comparar[1]), args.limiar)
+        return 1 if regressoes else 0
+
+    escalas = [int(float(n)) for n in args.escalas.split(",") if n.strip()]
+    resultado = executar(escalas, args.ilhas, args.repeticoes, args.sem_limites, not args.sem_memoria)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+
+    if args.comparar:
+        print()
+        return 1 if comparar(_ler(args.comparar[0]), resultado, args.limiar) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Mede o tempo de inicialização dos apps: import a frio dos módulos e custo por rerun.
+
+Uso:
+    python benchmarks/bench_imports.py [--repeticoes 5] [--reruns 20] [--json resultado.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = [
+    "poligonal_store",
+    "poligonal_core",
+    "streamlit",
+    "folium",
+    "streamlit_folium",
+    "pandas",
+    "geopy.geocoders",
+]
+
+APPS = ["poligonal.py", "poligonal_gabi.py"]
+
+
+def tempo_import_frio(modulo, repeticoes):
+    """Importa o módulo em um interpretador novo a cada repetição; retorna a mediana em ms."""
+    codigo = (
+        "import time; t = time.perf_counter(); "
+        f"import {modulo}; print(time.perf_counter() - t)"
+    )
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True
+        )
+        if saida.returncode != 0:
+            return None
+        tempos.append(float(saida.stdout.strip().splitlines()[-1]) * 1000)
+    return statistics.median(tempos)
+
+
+def tempo_rerun(app, reruns):
+    """Executa o script com o AppTest do Streamlit; retorna (primeira execução, mediana dos reruns) em ms."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(RAIZ, app), default_timeout=60)
+    t = time.perf_counter()
+    at.run()
+    primeira = (time.perf_counter() - t) * 1000
+
+    tempos = []
+    for _ in range(reruns):
+        t = time.perf_counter()
+        at.run()
+        tempos.append((time.perf_counter() - t) * 1000)
+    return primeira, statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    sys.path.insert(0, RAIZ)
+    resultado = {"imports_ms": {}, "apps_ms": {}}
+
+    print(f"{'módulo':<20} {'import a frio (ms)':>20}")
+    for modulo in MODULOS:
+        ms = tempo_import_frio(modulo, args.repeticoes)
+        resultado["imports_ms"][modulo] = ms
+        print(f"{modulo:<20} {'indisponível' if ms is None else f'{ms:.1f}':>20}")
+
+    print(f"\n{'app':<20} {'1ª execução (ms)':>18} {'rerun mediano (ms)':>20}")
+    for app in APPS:
+        primeira, mediana = tempo_rerun(app, args.reruns)
+        resultado["apps_ms"][app] = {"primeira": primeira, "rerun_mediano": mediana}
+        print(f"{app:<20} {primeira:>18.1f} {mediana:>20.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
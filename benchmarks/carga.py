@@ -0,0 +1,281 @@
+"""Teste de carga sem navegador: várias sessões simuladas digitalizando e exportando em paralelo.
+
+Cada sessão é um AppTest do Streamlit rodando um roteiro: busca de local, cliques do
+rio (gerado por benchmarks/sintetico.py), finalizar, cliques e finalização de cada ilha
+e as exportações do app. O AppTest usa estado global do Streamlit (o Runtime simulado),
+então o paralelismo é feito com ``--paralelas`` processos, cada um rodando o seu lote
+de sessões em sequência e mantendo-as vivas até o fim, como em um servidor com muitos
+usuários. Todos os processos gravam no mesmo banco SQLite (WAL).
+
+O Nominatim (geocodificação do OSM) é trocado por um geocodificador local com atraso
+configurável, e o st_folium é envolvido para devolver o clique roteirizado (o mapa
+continua sendo renderizado normalmente). O banco do poligonal_gabi.py fica em um
+diretório temporário.
+
+Relata p50/p95 da latência de cada interação (uma chamada de ``run()``, incluindo os
+st.rerun internos), das fases medidas pelo poligonal_medicao e a memória por sessão:
+o tamanho do session_state serializado e o crescimento do pico de RSS de cada processo
+dividido pelo número de sessões que ele manteve.
+
+Uso:
+    python benchmarks/carga.py [--app poligonal_gabi.py] [--sessoes 16] [--paralelas 8]
+                               [--vertices-rio 30] [--ilhas 2] [--vertices-ilha 8]
+                               [--atraso-geocodificacao 0.2] [--json resultado.json]
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from sintetico import CENTRO, gerar_rio
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+APPS = ["poligonal.py", "poligonal_gabi.py"]
+
+# Botões de exportação de cada app, na ordem em que o roteiro os aciona
+EXPORTACOES = {
+    "poligonal.py": ["💾 Salvar Todas as Poligonais"],
+    "poligonal_gabi.py": ["🔷 Exportar .geo", "💾 Exportar em Excel", "📦 Exportar Tudo (.zip)"],
+}
+
+_CHAVE_CLIQUE = "_carga_clique"
+
+
+# ----------------------------------------------------------------- substitutos locais
+
+class GeocodificadorLocal:
+    """Substituto do Nominatim: responde sempre com o centro dos dados sintéticos após ``atraso`` s."""
+
+    atraso = 0.2
+
+    def __init__(self, user_agent=None, **kwargs):
+        pass
+
+    def geocode(self, consulta, timeout=None):
+        time.sleep(self.atraso)
+        return SimpleNamespace(latitude=CENTRO[0], longitude=CENTRO[1], address=f"{consulta} (local)")
+
+
+def instalar_substitutos(atraso_geocodificacao):
+    """Troca o Nominatim pelo geocodificador local e faz o st_folium devolver o clique roteirizado."""
+    import geopy.geocoders
+    import streamlit as st
+    import streamlit_folium
+
+    GeocodificadorLocal.atraso = atraso_geocodificacao
+    geopy.geocoders.Nominatim = GeocodificadorLocal
+
+    original = streamlit_folium.st_folium
+
+    def st_folium_roteirizado(mapa, *args, **kwargs):
+        retorno = original(mapa, *args, **kwargs)
+        clique = st.session_state.get(_CHAVE_CLIQUE)
+        if clique is None:
+            return retorno
+        del st.session_state[_CHAVE_CLIQUE]
+        return dict(retorno or {}, last_clicked={"lat": clique[0], "lng": clique[1]}, zoom=15)
+
+    streamlit_folium.st_folium = st_folium_roteirizado
+
+
+class _ColetorFases(logging.Handler):
+    """Recebe as linhas JSON do logger ``poligonal.fases`` (ver poligonal_medicao)."""
+
+    def __init__(self):
+        super().__init__()
+        self.fases = defaultdict(list)
+
+    def emit(self, registro):
+        for nome, ms in json.loads(registro.getMessage())["fases_ms"].items():
+            self.fases[nome].append(ms)
+
+
+# ----------------------------------------------------------------- roteiro de uma sessão
+
+def _botao(at, rotulo):
+    return next(b for b in at.sidebar.button if b.label == rotulo)
+
+
+def _tamanho_estado(at):
+    """Bytes do session_state serializado com pickle (itens não serializáveis são ignorados)."""
+    total = 0
+    for chave in at.session_state:
+        try:
+            total += len(pickle.dumps(at.session_state[chave], protocol=pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            pass
+    return total
+
+
+def simular_sessao(app, indice, args):
+    """Executa o roteiro de uma sessão; retorna o AppTest e as latências (ms) por tipo de interação."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(RAIZ, app), default_timeout=120)
+    latencias = defaultdict(list)
+    erros = []
+
+    def interagir(tipo, acao):
+        t = time.perf_counter()
+        acao()
+        latencias[tipo].append((time.perf_counter() - t) * 1000)
+        if at.exception:
+            erros.append(f"{tipo}: {at.exception[0].message}")
+
+    def clicar_mapa(lat, lon):
+        at.session_state[_CHAVE_CLIQUE] = (lat, lon)
+        at.run()
+
+    interagir("abrir", at.run)
+    if args.atraso_geocodificacao >= 0:
+        at.sidebar.text_input[0].input("Cuiabá")
+        interagir("buscar", _botao(at, "Buscar").click().run)
+
+    rio, ilhas = gerar_rio(args.vertices_rio + args.ilhas * args.vertices_ilha, args.ilhas, semente=indice)
+    aneis = [("🔚 Finalizar Poligonal do Rio", rio)] + [("🔚 Finalizar Poligonal da Ilha", i) for i in ilhas]
+    for rotulo, anel in aneis:
+        # Um subconjunto espaçado dos vértices, como um usuário clicando o contorno
+        n = args.vertices_rio if rotulo.endswith("Rio") else args.vertices_ilha
+        for lat, lon in anel[np.linspace(0, len(anel) - 1, n).astype(int)].tolist():
+            interagir("clique", lambda: clicar_mapa(lat, lon))
+        interagir("finalizar", _botao(at, rotulo).click().run)
+
+    for rotulo in EXPORTACOES[app]:
+        interagir("exportar", _botao(at, rotulo).click().run)
+
+    return at, {"latencias": latencias, "erros": erros, "estado_bytes": _tamanho_estado(at)}
+
+
+# ----------------------------------------------------------------- relatório
+
+def _rss_mib():
+    """Pico do RSS do processo em MiB (ru_maxrss é KiB no Linux e bytes no macOS)."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 2 ** 20 if sys.platform == "darwin" else pico / 2 ** 10
+
+
+def _percentis(valores):
+    return {
+        "n": len(valores),
+        "p50": float(np.percentile(valores, 50)),
+        "p95": float(np.percentile(valores, 95)),
+        "max": float(np.max(valores)),
+    }
+
+
+def _lote(app, indices, args):
+    """Roda as sessões ``indices`` em sequência neste processo, mantendo todas vivas até o fim."""
+    instalar_substitutos(args.atraso_geocodificacao)
+    coletor = _ColetorFases()
+    logger = logging.getLogger("poligonal.fases")
+    logger.addHandler(coletor)
+    logger.setLevel(logging.INFO)
+
+    # Uma sessão de aquecimento carrega os módulos e não entra nas estatísticas
+    aquecimento = SimpleNamespace(**{**vars(args), "ilhas": 0, "vertices_rio": 3, "atraso_geocodificacao": -1})
+    simular_sessao(app, args.sessoes + indices[0], aquecimento)
+    coletor.fases.clear()
+    rss_inicial = _rss_mib()
+
+    vivas, sessoes = [], []
+    for i in indices:
+        at, sessao = simular_sessao(app, i, args)
+        vivas.append(at)
+        sessoes.append(sessao)
+    rss_final = _rss_mib()
+    return {"sessoes": sessoes, "fases": dict(coletor.fases), "rss_inicial": rss_inicial, "rss_final": rss_final}
+
+
+def executar(args):
+    # O caminho do banco é lido quando o app importa o poligonal_db (herdado pelos processos)
+    pasta_banco = tempfile.TemporaryDirectory(prefix="carga_poligonal_")
+    os.environ["POLIGONAL_DB"] = os.path.join(pasta_banco.name, "carga.db")
+
+    lotes = [list(range(args.sessoes))[p::args.paralelas] for p in range(min(args.paralelas, args.sessoes))]
+    t = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(lotes)) as executor:
+        resultados = list(executor.map(_lote, [args.app] * len(lotes), lotes, [args] * len(lotes)))
+    duracao = time.perf_counter() - t
+    pasta_banco.cleanup()
+
+    sessoes = [s for r in resultados for s in r["sessoes"]]
+    por_tipo, fases = defaultdict(list), defaultdict(list)
+    for sessao in sessoes:
+        for tipo, valores in sessao["latencias"].items():
+            por_tipo[tipo].extend(valores)
+    for r in resultados:
+        for nome, valores in r["fases"].items():
+            fases[nome].extend(valores)
+    todas = [v for valores in por_tipo.values() for v in valores]
+    estados = [s["estado_bytes"] / 2 ** 10 for s in sessoes]
+
+    return {
+        "app": args.app,
+        "sessoes": args.sessoes,
+        "paralelas": len(lotes),
+        "duracao_s": duracao,
+        "interacoes_por_s": len(todas) / duracao,
+        "latencia_ms": {"todas": _percentis(todas), **{t: _percentis(v) for t, v in por_tipo.items()}},
+        "fases_ms": {nome: _percentis(v) for nome, v in sorted(fases.items())},
+        "memoria": {
+            "estado_kib_p50": statistics.median(estados),
+            "estado_kib_max": max(estados),
+            "rss_pico_mib": max(r["rss_final"] for r in resultados),
+            "rss_por_sessao_mib": statistics.median(
+                (r["rss_final"] - r["rss_inicial"]) / len(lote) for r, lote in zip(resultados, lotes)
+            ),
+        },
+        "erros": [e for s in sessoes for e in s["erros"]],
+    }
+
+
+def imprimir(resultado):
+    print(f"{resultado['app']}: {resultado['sessoes']} sessões, {resultado['paralelas']} em paralelo, "
+          f"{resultado['duracao_s']:.1f} s ({resultado['interacoes_por_s']:.1f} interações/s)")
+    for titulo, chave in (("interação", "latencia_ms"), ("fase", "fases_ms")):
+        print(f"\n{titulo:<16} {'n':>6} {'p50 (ms)':>10} {'p95 (ms)':>10} {'máx (ms)':>10}")
+        for nome, p in resultado[chave].items():
+            print(f"{nome:<16} {p['n']:>6} {p['p50']:>10.1f} {p['p95']:>10.1f} {p['max']:>10.1f}")
+    m = resultado["memoria"]
+    print(f"\nsession_state por sessão: {m['estado_kib_p50']:.1f} KiB (mediana), {m['estado_kib_max']:.1f} KiB (máx)")
+    print(f"RSS: pico {m['rss_pico_mib']:.0f} MiB por processo, {m['rss_por_sessao_mib']:.2f} MiB por sessão")
+    if resultado["erros"]:
+        print(f"\n{len(resultado['erros'])} erro(s); primeiro: {resultado['erros'][0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", choices=APPS, default="poligonal_gabi.py")
+    parser.add_argument("--sessoes", type=int, default=16)
+    parser.add_argument("--paralelas", type=int, default=8)
+    parser.add_argument("--vertices-rio", type=int, default=30)
+    parser.add_argument("--ilhas", type=int, default=2)
+    parser.add_argument("--vertices-ilha", type=int, default=8)
+    parser.add_argument("--atraso-geocodificacao", type=float, default=0.2,
+                        help="segundos de resposta do geocodificador local (negativo: sem busca)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    resultado = executar(args)
+    imprimir(resultado)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+    return 1 if resultado["erros"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Geradores de rios e ilhas sintéticos para os benchmarks.
+
+O rio é uma faixa sinuosa (margem esquerda na ida, margem direita na volta) e as
+ilhas são elipses distribuídas ao longo do eixo, sempre dentro da faixa e sem se
+sobrepor. Tudo é devolvido em [lat, lon], no formato do PoligonalStore.
+"""
+import numpy as np
+
+CENTRO = (-15.608041311445879, -56.06389224529267)  # Mesmo ponto inicial dos apps
+
+_METROS_POR_GRAU = 111_320.0
+
+
+def _para_latlon(x, y, centro):
+    lat0, lon0 = centro
+    lat = lat0 + y / _METROS_POR_GRAU
+    lon = lon0 + x / (_METROS_POR_GRAU * np.cos(np.radians(lat0)))
+    return np.column_stack((lat, lon))
+
+
+def gerar_rio(n_vertices, n_ilhas=0, comprimento=20_000.0, largura=400.0, centro=CENTRO, semente=0):
+    """Gera (rio, ilhas) com aproximadamente ``n_vertices`` vértices no total.
+
+    Metade dos vértices (no mínimo 4) fica no rio; o restante é dividido entre as ilhas,
+    com pelo menos 3 vértices cada.
+    """
+    rng = np.random.default_rng(semente)
+    n_ilhas = int(n_ilhas)
+    n_rio = max(4, n_vertices // 2 if n_ilhas else n_vertices)
+    n_por_ilha = max(3, (n_vertices - n_rio) // n_ilhas) if n_ilhas else 0
+
+    # Eixo sinuoso e margens com pequeno ruído (como pontos clicados)
+    meia = n_rio // 2
+    s = np.linspace(0.0, comprimento, meia)
+    eixo = 0.1 * comprimento * np.sin(2 * np.pi * s / (0.4 * comprimento))
+    ruido = rng.normal(0.0, 0.02 * largura, (2, meia))
+    esquerda = eixo + largura / 2 + ruido[0]
+    direita = eixo - largura / 2 + ruido[1]
+    x = np.concatenate((s, s[::-1]))
+    y = np.concatenate((esquerda, direita[::-1]))
+    rio = _para_latlon(x, y, centro)
+
+    ilhas = []
+    if n_ilhas:
+        passo = comprimento / n_ilhas
+        semi_x = min(0.35 * passo, 4 * largura)
+        semi_y = 0.25 * largura
+        t = np.linspace(0.0, 2 * np.pi, n_por_ilha, endpoint=False)
+        for i in range(n_ilhas):
+            cx = (i + 0.5) * passo
+            cy = 0.1 * comprimento * np.sin(2 * np.pi * cx / (0.4 * comprimento))
+            ilhas.append(_para_latlon(cx + semi_x * np.cos(t), cy + semi_y * np.sin(t), centro))
+    return rio, ilhas
+
+
+def ilhas_automaticas(n_vertices):
+    """Quantidade de ilhas usada quando não informada: cresce com o tamanho do projeto."""
+    return int(max(1, min(200, n_vertices // 500)))
@@ -1,79 +1,17 @@
+import sqlite3
+import uuid
 import streamlit as st
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import folium
 from streamlit_folium import st_folium
-from io import BytesIO
-import streamlit as st
-import pandas as pd
-from pyproj import Proj, Transformer
 from branca.element import MacroElement, Element
 from jinja2 import Template
-
-def geodetic_to_utm(lat, lon):
-    """Converte coordenadas geodésicas (lat, lon) para UTM."""
-    # Determinar o fuso UTM baseado na longitude
-    
-    utm_zone = int((lon + 180) / 6) + 1
-    proj_string = f"+proj=utm +zone={utm_zone} +datum=WGS84 +units=m +no_defs"
-    
-    # Criar um transformador
-    transformer = Transformer.from_crs("EPSG:4326", proj_string, always_xy=True)
-    
-    # Converter coordenadas
-    easting, northing = transformer.transform(lon, lat)
-    return utm_zone, easting, northing
-
-def criar_gmsh(df):
-    df['num_no'] = range(1, len(df)+1)
-    df = df[['num_no', 'Tipo', 'Latitude', 'Longitude']]
-    df[["UTM_Zone", "x", "y"]] = df.apply(lambda row: geodetic_to_utm(row["Latitude"], row["Longitude"]), axis=1, result_type="expand")
-    df['num_no'] = range(1, len(df)+1)
-    df["UTM_Zone"] = df["UTM_Zone"].astype(int)
-
-    df_rio = df[df['Tipo'] == 'Rio'].reset_index(drop=True)
-    fim_rio = df_rio.at[df_rio.index[-1], 'num_no']
-    gmsh = []
-
-    for i in range(1, fim_rio+1):
-        no = f'Point({i})={{ {df_rio.at[i-1, "x"]}, {df_rio.at[i-1, "y"]}, 0}};'
-        gmsh.append(no)
-
-    loop = '{'
-    for i in range(1, fim_rio+1):
-        linha = f'Line({i})={{ {i}, {i+1 if i+1 != fim_rio+1 else 1} }};'
-        gmsh.append(linha)
-        loop += f'{i},'
-    loop = loop[:-1]
-    gmsh.append(f'Line Loop(1) = {loop}}};')
-
-    qtd_ilhas = len(df['Tipo'].unique()) - 1
-    loop2 = '{1,'
-    for ilha in range(1, qtd_ilhas+1):
-        nome_ilha = f'Ilha_{ilha}'
-        df_ilha = df[df['Tipo'] == nome_ilha].reset_index(drop=True)
-        for i in range(df_ilha.at[0, 'num_no'], df_ilha.at[df_ilha.index[-1], 'num_no']+1):
-            no = f'Point({i})={{ {df.at[i-1, "x"]}, {df.at[i-1, "y"]}, 0}};'
-            gmsh.append(no)
-
-        loop = '{'
-        for i in range(df_ilha.at[0, 'num_no'], df_ilha.at[df_ilha.index[-1], 'num_no']+1):
-            linha = f'Line({i})={{ {i}, {i+1 if i+1 != df_ilha.at[df_ilha.index[-1], "num_no"]+1 else df_ilha.at[0, "num_no"]} }};'
-            gmsh.append(linha)
-            loop += f'{i},'
-        loop = loop[:-1]
-        gmsh.append(f'Line Loop({ilha+1}) = {loop}}};')
-        loop2 += f'{-ilha-1},'
-    loop2 = loop2[:-1]
-    gmsh.append(f'Plane Surface(1) = {loop2}}};')
-
-    gmsh_text = '\n'.join(gmsh)
-    buffer = BytesIO()
-    buffer.write(gmsh_text.encode('utf-8'))
-    buffer.seek(0)
-    return buffer
+from poligonal_core import MAX_VERTICES_REAMOSTRAGEM, criar_gmsh, salvar_coordenadas
+from poligonal_db import carregar_projeto, remover_aneis, salvar_anel, salvar_projeto
+from poligonal_medicao import encerrar_rerun, medidor_da_sessao
+from poligonal_store import PoligonalStore
 
 st.set_page_config(page_title="Mundo Poligonal", layout="wide")
+medidor = medidor_da_sessao("poligonal")  # Tempos das fases deste rerun (?debug=1 mostra o painel)
 st.title("🌐Mapa com Poligonais Interativas")
 
 # ✅ Passo a passo logo no início
@@ -102,14 +40,18 @@ with st.expander("ℹ️ Como usar o sistema", expanded=True):
     #### 🛠️ Ferramentas de Edição
     - ❌ **Apagar Última Coordenada**: Remove o último ponto adicionado
     - 🗑️ **Remover Última Poligonal**: Exclui a última poligonal salva
+    - ↩️ **Desfazer** / ↪️ **Refazer**: Volta ou reaplica a última alteração
     - 🔃 **Reiniciar Tudo** (com confirmação):
        - Volta para a posição inicial
        - Remove TODAS as poligonais
+    - As poligonais finalizadas são salvas automaticamente no servidor: recarregar a página
+      (mantendo o `?id=` do link) restaura o projeto
 
     #### 💾 Exportação de Dados
     1. Clique em 💾 **Salvar Todas as Poligonais**
     2. Visualize a tabela com todas as coordenadas
     3. Baixe o arquivo Excel com 📥 **Baixar Arquivo Excel**
+    - Opcional: defina o **Espaçamento das arestas no GMSH** para redistribuir os vértices a cada N metros
 
     #### ⚠️ Boas Práticas
     - Sempre comece pela poligonal do rio
@@ -120,31 +62,57 @@ with st.expander("ℹ️ Como usar o sistema", expanded=True):
     """)
 
 # Inicializar variáveis no session_state para armazenar dados ao longo da execução
-if "coordenadas" not in st.session_state:
-    st.session_state.coordenadas = []  # Lista de coordenadas temporárias para a poligonal atual
-
-if "poligonal_principal" not in st.session_state:
-    st.session_state.poligonal_principal = None  # Guarda a poligonal principal salva
-
-if "poligonais_secundarias" not in st.session_state:
-    st.session_state.poligonais_secundarias = []  # Lista de poligonais secundárias
-
 if "ultimo_ponto" not in st.session_state:
     st.session_state.ultimo_ponto = [-15.608041311445879, -56.06389224529267]  # Ponto inicial no mapa (Liama)
 
 if "mensagens" not in st.session_state:
     st.session_state.mensagens = []  # Lista para armazenar mensagens de status
 
+# Cada navegador trabalha em um projeto identificado por ?id= na URL; as poligonais finalizadas
+# ficam no SQLite (o mesmo banco do poligonal_gabi.py) e voltam ao recarregar a página
+if "projeto_id" not in st.session_state:
+    st.session_state.projeto_id = st.query_params.get("id") or uuid.uuid4().hex[:12]
+    st.query_params["id"] = st.session_state.projeto_id
+
+if "poligonos" not in st.session_state:
+    # Rio, ilhas e poligonal atual em um único buffer
+    try:
+        aneis_salvos = carregar_projeto(st.session_state.projeto_id)
+        st.session_state.poligonos = PoligonalStore.a_partir_de(aneis_salvos)
+    except (sqlite3.Error, ValueError) as e:
+        aneis_salvos = []
+        st.session_state.poligonos = PoligonalStore()
+        st.session_state.mensagens.append(f"⚠️ Não foi possível restaurar o projeto salvo: {str(e)}")
+    if aneis_salvos:
+        st.session_state.ultimo_ponto = aneis_salvos[0].mean(axis=0).tolist()
+        st.session_state.mensagens.append(f"♻️ Projeto restaurado: Rio e {len(aneis_salvos) - 1} ilha(s)!")
+
+poligonos = st.session_state.poligonos
+
+
+def autosalvar(gravar, *args):
+    """Grava a alteração no SQLite; uma falha no banco não interrompe a edição."""
+    try:
+        with medidor.fase("banco"):
+            gravar(st.session_state.projeto_id, *args)
+    except sqlite3.Error as e:
+        st.session_state.mensagens.append(f"⚠️ Falha ao salvar automaticamente: {str(e)}")
+
 # Barra de busca de cidades
 st.sidebar.subheader("🔍 Buscar Localização")
 cidade = st.sidebar.text_input("Digite uma cidade, endereço ou ponto de interesse:")
 
 if st.sidebar.button("Buscar"):
     if cidade:
+        # geopy só é carregado quando o usuário faz uma busca
+        from geopy.geocoders import Nominatim
+        from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+
         try:
             with st.spinner("Buscando localização..."):
                 geolocator = Nominatim(user_agent="streamlit_map_search")
-                location = geolocator.geocode(cidade, timeout=10)
+                with medidor.fase("geocodificacao"):
+                    location = geolocator.geocode(cidade, timeout=10)
 
                 if location:
                     # Atualiza os estados globais com a nova localização
@@ -169,8 +137,9 @@ if st.sidebar.button("Buscar"):
             st.sidebar.error(f"❌ Erro inesperado: {str(e)}")
 
 # Criando o mapa centralizado no último ponto adicionado
-zoom = st.session_state.get("zoom_level", 12)  # Usa o zoom_level se existir, senão usa 30
-mapa = folium.Map(location=st.session_state.ultimo_ponto, zoom_start=zoom)
+with medidor.fase("mapa"):
+    zoom = st.session_state.get("zoom_level", 12)  # Usa o zoom_level se existir, senão usa 30
+    mapa = folium.Map(location=st.session_state.ultimo_ponto, zoom_start=zoom)
 
 
 # Forçar cursor padrão mantendo a funcionalidade de arrastar com JS puro
@@ -204,65 +173,68 @@ mapa.get_root().add_child(cursor_fix)
 
 
 # Adicionando os pontos individuais ao mapa como marcadores circulares vermelhos
-for coord in st.session_state.coordenadas:
-    folium.CircleMarker(
-        location=coord,
-        radius=4,  # 🔴 Tamanho do marcador
-        color="red",
-        fill=True,
-        fill_color="red",
-        fill_opacity=1.0
-    ).add_to(mapa)
+with medidor.fase("marcadores"):
+    for coord in poligonos.coordenadas.tolist():
+        folium.CircleMarker(
+            location=coord,
+            radius=4,  # 🔴 Tamanho do marcador
+            color="red",
+            fill=True,
+            fill_color="red",
+            fill_opacity=1.0
+        ).add_to(mapa)
 
 # Adicionando a poligonal atual (se houver mais de 2 pontos)
-if len(st.session_state.coordenadas) > 2:
-    folium.Polygon(
-        locations=st.session_state.coordenadas,
-        color="blue",
-        weight=2,
-        fill=True,
-        fill_color="blue",
-        fill_opacity=0.4
-    ).add_to(mapa)
-
-# Adicionando a poligonal principal, se já foi salva
-if st.session_state.poligonal_principal:
-    folium.Polygon(
-        locations=st.session_state.poligonal_principal,
-        color="green",  # Verde para a poligonal principal
-        weight=3,
-        fill=True,
-        fill_color="green",
-        fill_opacity=0.4
-    ).add_to(mapa)
-
-# Adicionando poligonais secundárias, se houver
-for poligono in st.session_state.poligonais_secundarias:
-    folium.Polygon(
-        locations=poligono,
-        color="magenta",  # Laranja para as poligonais secundárias
-        weight=2,
-        fill=True,
-        fill_color="magenta",
-        fill_opacity=0.4
-    ).add_to(mapa)
+with medidor.fase("mapa"):
+    if len(poligonos.coordenadas) > 2:
+        folium.Polygon(
+            locations=poligonos.coordenadas.tolist(),
+            color="blue",
+            weight=2,
+            fill=True,
+            fill_color="blue",
+            fill_opacity=0.4
+        ).add_to(mapa)
+
+    # Adicionando a poligonal principal, se já foi salva
+    if poligonos.poligonal_principal is not None:
+        folium.Polygon(
+            locations=poligonos.poligonal_principal.tolist(),
+            color="green",  # Verde para a poligonal principal
+            weight=3,
+            fill=True,
+            fill_color="green",
+            fill_opacity=0.4
+        ).add_to(mapa)
+
+    # Adicionando poligonais secundárias, se houver
+    for poligono in poligonos.poligonais_secundarias:
+        folium.Polygon(
+            locations=poligono.tolist(),
+            color="magenta",  # Laranja para as poligonais secundárias
+            weight=2,
+            fill=True,
+            fill_color="magenta",
+            fill_opacity=0.4
+        ).add_to(mapa)
 
 # Renderizando o mapa interativo e capturando cliques do usuário
 st.subheader("Mapa Interativo")
-map_data = st_folium(
-    mapa,
-    height=500,
-    width=700,
-    returned_objects=["last_clicked", "zoom"]  # ← Captura também o zoom atual!
-)
+with medidor.fase("st_folium"):
+    map_data = st_folium(
+        mapa,
+        height=500,
+        width=700,
+        returned_objects=["last_clicked", "zoom"]  # ← Captura também o zoom atual!
+    )
 
 # Captura de cliques no mapa e adiciona novas coordenadas à lista
 if map_data and "last_clicked" in map_data and map_data["last_clicked"] is not None:
     novo_ponto = [map_data["last_clicked"]["lat"], map_data["last_clicked"]["lng"]]
     
     # Adiciona o novo ponto apenas se ele ainda não estiver na lista
-    if novo_ponto not in st.session_state.coordenadas:
-        st.session_state.coordenadas.append(novo_ponto)
+    if not poligonos.contem(*novo_ponto):
+        poligonos.adicionar_ponto(*novo_ponto)
         st.session_state.ultimo_ponto = novo_ponto  # Atualiza a centralização do mapa
         
         # ✅ Mantém o zoom atual (se disponível) em vez de resetar
@@ -273,19 +245,21 @@ if map_data and "last_clicked" in map_data and map_data["last_clicked"] is not N
 
 # Exibir as coordenadas utilizadas na poligonal atual
 #st.subheader("Coordenadas da Poligonal Atual")
-#st.write(st.session_state.coordenadas if st.session_state.coordenadas else "Nenhuma coordenada definida.")
+#st.write(poligonos.coordenadas if len(poligonos.coordenadas) else "Nenhuma coordenada definida.")
 
 # Botão para excluir a última poligonal salva
 if st.sidebar.button("🗑️ Remover Última Poligonal"):
-    if st.session_state.poligonais_secundarias:
+    if poligonos.n_ilhas:
         # Remove a última poligonal secundária e identifica qual foi removida
-        index_removida = len(st.session_state.poligonais_secundarias)  # Índice da última ilha
-        st.session_state.poligonais_secundarias.pop()
+        index_removida = poligonos.n_ilhas  # Índice da última ilha
+        poligonos.remover_ultima_poligonal()
+        autosalvar(remover_aneis, poligonos.n_aneis)
         st.session_state.mensagens.append(f"🗑️ Poligonal Ilha_{index_removida} removida com sucesso!")
         st.rerun()
-    elif st.session_state.poligonal_principal:
+    elif poligonos.poligonal_principal is not None:
         # Se não houver poligonais secundárias, remove a poligonal principal
-        st.session_state.poligonal_principal = None
+        poligonos.remover_ultima_poligonal()
+        autosalvar(remover_aneis, poligonos.n_aneis)
         st.session_state.mensagens.append("🗑️ Poligonal do Rio removida com sucesso!")
         st.rerun()
     else:
@@ -293,19 +267,39 @@ if st.sidebar.button("🗑️ Remover Última Poligonal"):
 
 # Botão para remover o último ponto adicionado
 if st.sidebar.button("❌ Apagar Última Coordenada"):
-    if st.session_state.coordenadas:
-        st.session_state.coordenadas.pop()  # Remove o último ponto da lista
+    if poligonos.apagar_ultimo_ponto():  # Remove o último ponto da poligonal atual
         st.success("🗑️ Último ponto removido!")
         st.rerun()
     else:
         st.warning("⚠️ Nenhum ponto para remover!")
 
+def autosalvar_historico(tipo, n_aneis_antes):
+    """Grava no banco só o que desfazer/refazer mudou nos anéis finalizados."""
+    if tipo in ("ponto", "apagar"):
+        return  # a poligonal em edição não é persistida
+    if tipo in ("finalizar", "remover") and poligonos.n_aneis > n_aneis_antes:
+        autosalvar(salvar_anel, poligonos.n_aneis - 1, poligonos.anel(poligonos.n_aneis - 1))
+    elif tipo in ("finalizar", "remover"):
+        autosalvar(remover_aneis, poligonos.n_aneis)
+    else:
+        autosalvar(salvar_projeto, poligonos.aneis)
+
+# Botões para desfazer/refazer a última alteração (pontos, finalizações e remoções)
+col_desfazer, col_refazer = st.sidebar.columns(2)
+if col_desfazer.button("↩️ Desfazer", disabled=not poligonos.pode_desfazer):
+    n_aneis_antes = poligonos.n_aneis
+    autosalvar_historico(poligonos.desfazer(), n_aneis_antes)
+    st.rerun()
+if col_refazer.button("↪️ Refazer", disabled=not poligonos.pode_refazer):
+    n_aneis_antes = poligonos.n_aneis
+    autosalvar_historico(poligonos.refazer(), n_aneis_antes)
+    st.rerun()
+
 # Botão para salvar a poligonal principal
-if not st.session_state.poligonal_principal:
+if poligonos.poligonal_principal is None:
     if st.sidebar.button("🔚 Finalizar Poligonal do Rio"):
-        if len(st.session_state.coordenadas) > 2:  # Exige ao menos 3 pontos
-            st.session_state.poligonal_principal = st.session_state.coordenadas.copy()
-            st.session_state.coordenadas = []  # Reseta a poligonal temporária
+        if poligonos.finalizar_poligonal():  # Exige ao menos 3 pontos
+            autosalvar(salvar_anel, poligonos.n_aneis - 1, poligonos.anel(poligonos.n_aneis - 1))
             st.session_state.mensagens.append("✅ Poligonal do Rio finalizada com sucesso!")
             st.rerun()
         else:
@@ -315,12 +309,11 @@ else:
 
 
 # Botão para salvar poligonais secundárias (apenas se a poligonal principal foi salva)
-if st.session_state.poligonal_principal:
+if poligonos.poligonal_principal is not None:
     if st.sidebar.button("🔚 Finalizar Poligonal da Ilha"):
-        if len(st.session_state.coordenadas) > 2:  # Exige ao menos 3 pontos
-            st.session_state.poligonais_secundarias.append(st.session_state.coordenadas.copy())
-            st.session_state.coordenadas = []  # Reseta a poligonal temporária
-            st.session_state.mensagens.append(f"✅ Poligonal Ilha_{len(st.session_state.poligonais_secundarias)} finalizada com sucesso!")
+        if poligonos.finalizar_poligonal():  # Exige ao menos 3 pontos
+            autosalvar(salvar_anel, poligonos.n_aneis - 1, poligonos.anel(poligonos.n_aneis - 1))
+            st.session_state.mensagens.append(f"✅ Poligonal Ilha_{poligonos.n_ilhas} finalizada com sucesso!")
             st.rerun()
         else:
             st.warning("⚠️ A poligonal deve ter pelo menos 3 pontos!")
@@ -332,39 +325,21 @@ st.sidebar.subheader("Status das Poligonais")
 for mensagem in st.session_state.mensagens:
     st.sidebar.success(mensagem)
 
-# **Função para salvar todas as poligonais em um arquivo Excel**
-def salvar_coordenadas():
-    """Salva todas as poligonais em um arquivo Excel e gera um link para download."""
-    data = []
-
-    # Adiciona a poligonal principal ao conjunto de dados
-    if st.session_state.poligonal_principal:
-        for ponto in st.session_state.poligonal_principal:
-            data.append(["Rio", ponto[0], ponto[1]])
-
-    # Adiciona as poligonais secundárias ao conjunto de dados
-    for idx, poligono in enumerate(st.session_state.poligonais_secundarias):
-        for ponto in poligono:
-            data.append([f"Ilha_{idx+1}", ponto[0], ponto[1]])
-
-    if data:
-        # Criar um DataFrame do Pandas para armazenar os dados
-        df = pd.DataFrame(data, columns=["Tipo", "Latitude", "Longitude"])
-        
-        # Criar um buffer de bytes para armazenar o arquivo Excel
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, sheet_name="Poligonais", index=False)
-        
-        output.seek(0)  # Retornar ao início do arquivo para o download
-        
-        return output, df
-
-    return None
+# Reamostragem das arestas antes de gerar o .geo/malha (0 = mantém os pontos clicados)
+espacamento = st.sidebar.number_input(
+    "Espaçamento das arestas no GMSH (m)", min_value=0.0, value=0.0, step=10.0,
+    help=f"Redistribui os vértices de cada poligonal a cada N metros antes de gerar o arquivo GMSH (no máximo {MAX_VERTICES_REAMOSTRAGEM} vértices por poligonal). Use 0 para manter os pontos originais."
+)
+fator_curvatura = st.sidebar.slider(
+    "Refinamento por curvatura", min_value=0.0, max_value=5.0, value=0.0, step=0.5,
+    help="Aproxima os vértices onde o contorno faz curvas (0 = espaçamento uniforme)."
+)
 
 # Botão para salvar todas as poligonais em um arquivo Excel e disponibilizar para download
 if st.sidebar.button("💾 Salvar Todas as Poligonais"):
-    resultado = salvar_coordenadas()
+    with medidor.fase("exportar_excel"):
+        resultado = salvar_coordenadas(poligonos.poligonal_principal, poligonos.poligonais_secundarias,
+                                       colunas=("Tipo", "Latitude", "Longitude"))
 
     if resultado is None:
         st.warning("⚠️ Nenhuma poligonal disponível para salvar!")
@@ -382,9 +357,12 @@ if st.sidebar.button("💾 Salvar Todas as Poligonais"):
                 file_name="poligonais.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
+            with medidor.fase("exportar_gmsh"):
+                arquivo_gmsh = criar_gmsh(df, espacamento=espacamento or None, fator_curvatura=fator_curvatura,
+                                          projecao=poligonos.projecao)
             st.sidebar.download_button(
                 label="📥 Baixar Arquivo GMSH",
-                data=criar_gmsh(df),
+                data=arquivo_gmsh,
                 file_name="malha.txt",
                 mime="text/plain"
             )
@@ -398,9 +376,8 @@ confirmar_remocao = st.session_state.get("confirmar_remocao", False)
 if st.sidebar.button("🔃 Reiniciar Tudo"):
     if confirmar_remocao:
         # Limpa todos os dados
-        st.session_state.coordenadas = []
-        st.session_state.poligonal_principal = None
-        st.session_state.poligonais_secundarias = []
+        poligonos.reiniciar()
+        autosalvar(salvar_projeto, [])
         st.session_state.mensagens = []
         
         # Volta para posição inicial (São Paulo)
@@ -414,4 +391,6 @@ if st.sidebar.button("🔃 Reiniciar Tudo"):
     else:
         st.warning("⚠️ Confirme a exclusão para reiniciar")
 
-st.sidebar.checkbox("Confirmar exclusão", key="confirmar_remocao")
\ No newline at end of file
+st.sidebar.checkbox("Confirmar exclusão", key="confirmar_remocao")
+
+encerrar_rerun(medidor)
\ No newline at end of file
@@ -3,9 +3,11 @@ from streamlit_folium import st_folium
 import folium
 import osmnx as ox
 import geopandas as gpd
+from poligonal_medicao import encerrar_rerun, medidor_da_sessao
 
 # Configuração da página
 st.set_page_config(layout="wide")
+medidor = medidor_da_sessao("poligonal2")  # Tempos das fases deste rerun (?debug=1 mostra o painel)
 st.title("🌍 Detecção Automática de Poligonais - Rios e Ilhas")
 
 # Estado inicial
@@ -19,31 +21,33 @@ if "ultimo_centro" not in st.session_state:
     st.session_state.ultimo_centro = [-15.6, -56.06]  # Centro padrão
 
 # Criar mapa
-mapa = folium.Map(location=st.session_state.ultimo_centro, zoom_start=15, tiles="CartoDB positron")
-
-# Adicionar poligonal principal
-if st.session_state.poligonal_principal:
-    folium.Polygon(
-        locations=st.session_state.poligonal_principal,
-        color="green",
-        weight=3,
-        fill=True,
-        fill_opacity=0.5
-    ).add_to(mapa)
-
-# Adicionar poligonais secundárias
-for pol in st.session_state.poligonais_secundarias:
-    folium.Polygon(
-        locations=pol,
-        color="magenta",
-        weight=2,
-        fill=True,
-        fill_opacity=0.4
-    ).add_to(mapa)
+with medidor.fase("mapa"):
+    mapa = folium.Map(location=st.session_state.ultimo_centro, zoom_start=15, tiles="CartoDB positron")
+
+    # Adicionar poligonal principal
+    if st.session_state.poligonal_principal:
+        folium.Polygon(
+            locations=st.session_state.poligonal_principal,
+            color="green",
+            weight=3,
+            fill=True,
+            fill_opacity=0.5
+        ).add_to(mapa)
+
+    # Adicionar poligonais secundárias
+    for pol in st.session_state.poligonais_secundarias:
+        folium.Polygon(
+            locations=pol,
+            color="magenta",
+            weight=2,
+            fill=True,
+            fill_opacity=0.4
+        ).add_to(mapa)
 
 # Mostrar mapa
 st.subheader("🔍 Navegue e clique abaixo para detectar contornos hídricos")
-map_data = st_folium(mapa, height=600, width=1000, returned_objects=["bounds", "center"])
+with medidor.fase("st_folium"):
+    map_data = st_folium(mapa, height=600, width=1000, returned_objects=["bounds", "center"])
 
 # Atualizar centro atual do mapa
 if map_data and "center" in map_data:
@@ -70,7 +74,8 @@ if map_data and "bounds" in map_data:
     st.write("Limites do mapa:", map_data["bounds"])  # ✔ Ajuda a depurar
 
     if st.button("🔎 Detectar Poligonais da Área Enquadrada"):
-        resultado = detectar_agua_por_bounding_box(map_data["bounds"])
+        with medidor.fase("osm"):
+            resultado = detectar_agua_por_bounding_box(map_data["bounds"])
 
         if resultado is not None and not resultado.empty:
             st.success(f"💧 {len(resultado)} poligonais d'água detectadas!")
@@ -84,4 +89,6 @@ if map_data and "bounds" in map_data:
                     st.session_state.poligonais_secundarias.append(coords)
             st.rerun()
         else:
-            st.warning("Nenhuma feição hídrica encontrada nessa região.")
\ No newline at end of file
+            st.warning("Nenhuma feição hídrica encontrada nessa região.")
+
+encerrar_rerun(medidor)
\ No newline at end of file
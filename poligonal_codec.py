@@ -0,0 +1,130 @@
+"""Codificação compacta das poligonais (Rio e Ilhas) para salvar, compartilhar e desenhar.
+
+As coordenadas são arredondadas para ``precisao`` casas decimais e guardadas como
+diferenças inteiras entre vértices consecutivos no formato binário .plg (cabeçalho +
+varints em zigue-zague), compactado com zlib no token de compartilhamento (base64
+seguro para URL).
+
+Toda a codificação é vetorizada com NumPy, sem laço por vértice.
+"""
+import base64
+import zlib
+
+import numpy as np
+
+PRECISAO_PADRAO = 6  # ~0,1 m no equador
+
+_ASSINATURA = b"PLG\x01"
+
+# Tamanho máximo do .plg descompactado de um token (~ milhões de vértices): tokens vêm de
+# links e campos de texto e não podem ocupar a memória do servidor compartilhado
+LIMITE_BYTES_TOKEN = 32 * 2 ** 20
+
+
+# ----------------------------------------------------------------- inteiros
+
+def _zigzag(valores):
+    valores = valores.astype(np.int64)
+    return ((valores << 1) ^ (valores >> 63)).astype(np.uint64)
+
+
+def _dezigzag(valores):
+    valores = valores.astype(np.uint64)
+    return ((valores >> np.uint64(1)).astype(np.int64) ^ -(valores & np.uint64(1)).astype(np.int64))
+
+
+def _deltas(aneis, precisao):
+    """Arredonda os anéis concatenados e devolve as diferenças inteiras (lat, lon intercalados)."""
+    coords = np.concatenate([np.asarray(a, dtype=np.float64).reshape(-1, 2) for a in aneis])
+    inteiros = np.round(coords * 10.0 ** precisao).astype(np.int64)
+    return np.diff(inteiros, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+
+
+def _desfazer_deltas(deltas, precisao):
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10.0 ** precisao
+
+
+def _blocos(valores, bits, continuacao):
+    """Quebra cada valor em blocos de ``bits`` bits (menos significativo primeiro), marcando
+    com ``continuacao`` todos os blocos menos o último. Retorna os blocos em sequência."""
+    valores = np.asarray(valores, dtype=np.uint64)
+    max_blocos = -(-64 // bits)
+    deslocamentos = np.arange(max_blocos, dtype=np.uint64) * np.uint64(bits)
+    n_blocos = 1 + np.count_nonzero(valores[:, None] >> deslocamentos[1:] != 0, axis=1)
+    blocos = (valores[:, None] >> deslocamentos) & np.uint64((1 << bits) - 1)
+    posicao = np.arange(max_blocos)
+    blocos[posicao < (n_blocos - 1)[:, None]] |= np.uint64(continuacao)
+    return blocos[posicao < n_blocos[:, None]]
+
+
+def _juntar_blocos(blocos, bits, continuacao):
+    """Inverso de _blocos: reconstrói os valores a partir da sequência de blocos."""
+    blocos = np.asarray(blocos, dtype=np.uint64)
+    if not len(blocos):
+        return np.empty(0, dtype=np.uint64)
+    fim = (blocos & np.uint64(continuacao)) == 0
+    if not fim[-1]:
+        raise ValueError("Dados truncados: o último valor não termina.")
+    inicios = np.concatenate(([0], np.flatnonzero(fim)[:-1] + 1))
+    valor_de = np.cumsum(fim) - fim
+    posicao = (np.arange(len(blocos)) - inicios[valor_de]).astype(np.uint64)
+    termos = (blocos & np.uint64((1 << bits) - 1)) << (posicao * np.uint64(bits))
+    return np.add.reduceat(termos, inicios)
+
+
+# ----------------------------------------------------------------- binário
+
+def codificar_binario(aneis, precisao=PRECISAO_PADRAO):
+    """Codifica os anéis (Rio primeiro) no formato binário .plg."""
+    tamanhos = np.array([len(a) for a in aneis], dtype=np.uint64)
+    cabecalho = _blocos(np.concatenate(([len(aneis)], tamanhos)).astype(np.uint64), 7, 0x80)
+    corpo = _blocos(_zigzag(_deltas(aneis, precisao)), 7, 0x80) if len(aneis) else np.empty(0)
+    return (
+        _ASSINATURA + bytes([precisao])
+        + cabecalho.astype(np.uint8).tobytes()
+        + corpo.astype(np.uint8).tobytes()
+    )
+
+
+def decodificar_binario(dados):
+    """Decodifica o formato binário .plg em uma lista de arrays N x 2 [lat, lon]."""
+    if len(dados) <= 4 or dados[:4] != _ASSINATURA:
+        raise ValueError("Arquivo de projeto inválido.")
+    precisao = dados[4]
+    valores = _juntar_blocos(np.frombuffer(dados, dtype=np.uint8, offset=5), 7, 0x80)
+    if not len(valores):
+        raise ValueError("Arquivo de projeto inválido.")
+
+    n_aneis = int(valores[0])
+    tamanhos = valores[1:1 + n_aneis].astype(np.int64)
+    deltas = _dezigzag(valores[1 + n_aneis:])
+    # Todo anel precisa de 3 vértices; tamanhos enormes viram negativos no int64
+    if len(tamanhos) != n_aneis or np.any(tamanhos < 3) or len(deltas) != 2 * tamanhos.sum():
+        raise ValueError("Arquivo de projeto corrompido.")
+    coords = _desfazer_deltas(deltas, precisao)
+    return np.split(coords, np.cumsum(tamanhos)[:-1]) if n_aneis else []
+
+
+def gerar_token(aneis, precisao=PRECISAO_PADRAO):
+    """Token curto (zlib + base64 seguro para URL) para compartilhar o projeto."""
+    compactado = zlib.compress(codificar_binario(aneis, precisao), 9)
+    return base64.urlsafe_b64encode(compactado).rstrip(b"=").decode("ascii")
+
+
+def ler_token(token):
+    """Inverso de gerar_token; lança ValueError se o token for inválido."""
+    token = token.strip()
+    try:
+        descompactador = zlib.decompressobj()
+        dados = descompactador.decompress(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)),
+                                          LIMITE_BYTES_TOKEN)
+    except (ValueError, zlib.error):
+        raise ValueError("Token de projeto inválido.")
+    if descompactador.unconsumed_tail:
+        raise ValueError("Token de projeto grande demais.")
+    return decodificar_binario(dados)
+
+
+def quantizar(anel, precisao=PRECISAO_PADRAO):
+    """Arredonda um anel para ``precisao`` casas e devolve lista (menos bytes no HTML do mapa)."""
+    return np.round(np.asarray(anel, dtype=np.float64), precisao).tolist()
@@ -0,0 +1,536 @@
+"""Núcleo dos apps de poligonais: geometria e exportações, sem dependência do Streamlit.
+
+Dependências pesadas (pandas/xlsxwriter, gmsh) são importadas no primeiro uso,
+para que o script do Streamlit carregue rápido a cada execução.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+import numpy as np
+
+# A API do gmsh é um singleton do processo e não aceita uso concorrente
+_TRAVA_GMSH = threading.Lock()
+
+
+def criar_gmsh(df, espacamento=None, fator_curvatura=0.0, projecao=None):
+    """Gera o arquivo GMSH (formato antigo do poligonal.py) a partir do DataFrame de salvar_coordenadas.
+
+    Todos os vértices são projetados de uma vez na ``projecao`` do projeto (por padrão,
+    escolher_projecao do Rio). Com ``espacamento`` (m), cada poligonal é reamostrada
+    (ver reamostrar_anel).
+    """
+    df['num_no'] = range(1, len(df)+1)
+    df = df[['num_no', 'Tipo', 'Latitude', 'Longitude']]
+    if projecao is None:
+        projecao = escolher_projecao(df.loc[df['Tipo'] == 'Rio', ['Latitude', 'Longitude']].to_numpy())
+    x, y = projecao.projetar(df['Latitude'].to_numpy(), df['Longitude'].to_numpy())
+    df = df.assign(x=x, y=y)
+
+    if espacamento:
+        import pandas as pd
+
+        partes = []
+        for tipo, grupo in df.groupby('Tipo', sort=False):
+            x, y = reamostrar_anel(grupo['x'].to_numpy(), grupo['y'].to_numpy(), espacamento, fator_curvatura)
+            partes.append(pd.DataFrame({'Tipo': tipo, 'x': x, 'y': y}))
+        df = pd.concat(partes, ignore_index=True)
+        df['num_no'] = range(1, len(df)+1)
+
+    df_rio = df[df['Tipo'] == 'Rio'].reset_index(drop=True)
+    fim_rio = df_rio.at[df_rio.index[-1], 'num_no']
+    # Como no .geo: o arquivo registra em que projeção estão os x, y
+    gmsh = _cabecalho_projecao(projecao)
+
+    for i in range(1, fim_rio+1):
+        no = f'Point({i})={{ {df_rio.at[i-1, "x"]}, {df_rio.at[i-1, "y"]}, 0}};'
+        gmsh.append(no)
+
+    loop = '{'
+    for i in range(1, fim_rio+1):
+        linha = f'Line({i})={{ {i}, {i+1 if i+1 != fim_rio+1 else 1} }};'
+        gmsh.append(linha)
+        loop += f'{i},'
+    loop = loop[:-1]
+    gmsh.append(f'Line Loop(1) = {loop}}};')
+
+    qtd_ilhas = len(df['Tipo'].unique()) - 1
+    loop2 = '{1,'
+    for ilha in range(1, qtd_ilhas+1):
+        nome_ilha = f'Ilha_{ilha}'
+        df_ilha = df[df['Tipo'] == nome_ilha].reset_index(drop=True)
+        for i in range(df_ilha.at[0, 'num_no'], df_ilha.at[df_ilha.index[-1], 'num_no']+1):
+            no = f'Point({i})={{ {df.at[i-1, "x"]}, {df.at[i-1, "y"]}, 0}};'
+            gmsh.append(no)
+
+        loop = '{'
+        for i in range(df_ilha.at[0, 'num_no'], df_ilha.at[df_ilha.index[-1], 'num_no']+1):
+            linha = f'Line({i})={{ {i}, {i+1 if i+1 != df_ilha.at[df_ilha.index[-1], "num_no"]+1 else df_ilha.at[0, "num_no"]} }};'
+            gmsh.append(linha)
+            loop += f'{i},'
+        loop = loop[:-1]
+        gmsh.append(f'Line Loop({ilha+1}) = {loop}}};')
+        loop2 += f'{-ilha-1},'
+    loop2 = loop2[:-1]
+    gmsh.append(f'Plane Surface(1) = {loop2}}};')
+
+    gmsh_text = '\n'.join(gmsh)
+    buffer = BytesIO()
+    buffer.write(gmsh_text.encode('utf-8'))
+    buffer.seek(0)
+    return buffer
+
+
+def _decimal_para_dms(graus, is_lat):
+    """Converte graus decimais (escalar ou array) para string DMS (graus°min'seg'')."""
+    graus = np.asarray(graus, dtype=np.float64)
+    hemisferio = np.where(graus < 0, "S", "N") if is_lat else np.where(graus < 0, "W", "E")
+    graus = np.abs(graus)
+    d = graus.astype(np.int64)
+    m = ((graus - d) * 60).astype(np.int64)
+    s = (graus - d - m / 60) * 3600
+    dms = np.char.add(np.char.add(np.char.add(d.astype(str), "°"), np.char.add(m.astype(str), "'")),
+                      np.char.add(np.char.mod('%.4f"', s), hemisferio))
+    return str(dms) if dms.ndim == 0 else dms
+
+
+def _aneis_nomeados(rio, ilhas):
+    """Lista [(nome, array N x 2)] com o Rio primeiro e sem anéis vazios."""
+    aneis = ([("Rio", rio)] if rio is not None else []) + [(f"Ilha_{i+1}", p) for i, p in enumerate(ilhas)]
+    return [(nome, np.asarray(p, dtype=np.float64).reshape(-1, 2)) for nome, p in aneis if len(p)]
+
+
+def exportar_geodesicas(rio, ilhas):
+    """Exporta coordenadas geodésicas (decimal + DMS) em CSV."""
+    import pandas as pd
+    if rio is None or len(rio) == 0:
+        return None, "Nenhuma poligonal disponível para exportar!"
+
+    aneis = _aneis_nomeados(rio, ilhas)
+    pontos = np.concatenate([p for _, p in aneis])
+    df = pd.DataFrame({
+        "Tipo": np.repeat([nome for nome, _ in aneis], [len(p) for _, p in aneis]),
+        "Latitude (decimal)": pontos[:, 0],
+        "Longitude (decimal)": pontos[:, 1],
+        "Latitude (DMS)": _decimal_para_dms(pontos[:, 0], is_lat=True),
+        "Longitude (DMS)": _decimal_para_dms(pontos[:, 1], is_lat=False),
+    })
+    return df.to_csv(index=False, sep=";", decimal=",").encode("utf-8"), None
+
+
+def _transversa_mercator_np(lat, lon, lon0, k0, falso_norte):
+    """Transversa de Mercator (série de Snyder, WGS84) com meridiano central ``lon0`` em graus.
+
+    ``lon0`` e ``falso_norte`` podem ser escalares (uma projeção para todos os pontos) ou arrays.
+    """
+    a = 6378137.0
+    f = 1 / 298.257223563
+    e2 = 2 * f - f ** 2
+    e2l = e2 / (1 - e2)
+    lon0 = np.radians(lon0)
+    latr = np.radians(lat)
+    lonr = np.radians(lon)
+    N = a / np.sqrt(1 - e2 * np.sin(latr) ** 2)
+    T = np.tan(latr) ** 2
+    C = e2l * np.cos(latr) ** 2
+    A = np.cos(latr) * (lonr - lon0)
+    M = a * (
+        (1 - e2/4 - 3*e2**2/64 - 5*e2**3/256) * latr
+        - (3*e2/8 + 3*e2**2/32 + 45*e2**3/1024) * np.sin(2*latr)
+        + (15*e2**2/256 + 45*e2**3/1024) * np.sin(4*latr)
+        - (35*e2**3/3072) * np.sin(6*latr)
+    )
+    x = k0 * N * (A + (1-T+C)*A**3/6 + (5-18*T+T**2+72*C-58*e2l)*A**5/120) + 500000
+    y = k0 * (M + N * np.tan(latr) * (
+        A**2/2 + (5-T+9*C+4*C**2)*A**4/24 + (61-58*T+T**2+600*C-330*e2l)*A**6/720
+    ))
+    return x, y + falso_norte
+
+
+class Projecao(namedtuple("Projecao", "zona hemisferio lon0 k0")):
+    """Projeção única do projeto: UTM (``zona``) ou Transversa de Mercator local (``zona`` None)."""
+
+    __slots__ = ()
+
+    @property
+    def descricao(self):
+        if self.zona is not None:
+            return f"UTM Zona {self.zona}{self.hemisferio} (WGS84)"
+        return f"Transversa de Mercator local, meridiano central {self.lon0}° (WGS84)"
+
+    @property
+    def proj(self):
+        """Definição PROJ equivalente (para reprojetar o .geo em um SIG)."""
+        if self.zona is not None:
+            sul = " +south" if self.hemisferio == "S" else ""
+            return f"+proj=utm +zone={self.zona}{sul} +datum=WGS84 +units=m +no_defs"
+        return (f"+proj=tmerc +lat_0=0 +lon_0={self.lon0} +k={self.k0:g} +x_0=500000 "
+                f"+y_0={10000000 if self.hemisferio == 'S' else 0} +datum=WGS84 +units=m +no_defs")
+
+    def projetar(self, lat, lon):
+        """Projeta arrays de lat/lon em uma única passada vetorizada; retorna (x, y) em metros."""
+        falso_norte = 10000000.0 if self.hemisferio == "S" else 0.0
+        return _transversa_mercator_np(
+            np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64), self.lon0, self.k0, falso_norte
+        )
+
+
+# Quanto (em graus) o Rio pode passar da borda do fuso dominante antes de usar a TM local
+MARGEM_FUSO = 1.0
+
+
+def escolher_projecao(rio):
+    """Escolhe a projeção do projeto a partir do Rio (feito uma vez, ao finalizá-lo).
+
+    Usa o fuso UTM com mais vértices quando todo o Rio fica a até 3° + MARGEM_FUSO do
+    meridiano central dele; senão, uma Transversa de Mercator local centrada na caixa
+    envolvente. O hemisfério (falso norte) vem do centro da caixa.
+    """
+    rio = np.asarray(rio, dtype=np.float64).reshape(-1, 2)
+    lat, lon = rio[:, 0], rio[:, 1]
+    hemisferio = "S" if lat.min() + lat.max() < 0 else "N"
+
+    zonas, contagens = np.unique(((lon + 180) / 6).astype(np.int64) + 1, return_counts=True)
+    zona = int(zonas[np.argmax(contagens)])
+    lon0 = -183 + zona * 6
+    if np.abs(lon - lon0).max() <= 3 + MARGEM_FUSO:
+        return Projecao(zona, hemisferio, float(lon0), 0.9996)
+    return Projecao(None, hemisferio, round(float(lon.min() + lon.max()) / 2, 4), 1.0)
+
+
+# Limite de vértices por anel na reamostragem: um espaçamento muito pequeno (ex.: 0,01 m
+# em um rio de 20 km) geraria milhões de pontos no .geo e na malha
+MAX_VERTICES_REAMOSTRAGEM = 20_000
+
+
+def reamostrar_anel(x, y, espacamento, fator_curvatura=0.0):
+    """Redistribui os vértices de um anel fechado (coordenadas projetadas) a cada ``espacamento`` metros.
+
+    Com ``fator_curvatura`` > 0 o espaçamento diminui onde o contorno faz curvas: o giro é
+    medido numa grade uniforme (passo ``espacamento``/4) e cada trecho pesa
+    1 + fator * (giro em ±``espacamento`` ao redor / π) no comprimento de arco, de modo que
+    só a vizinhança das curvas é refinada, e não a aresta clicada inteira. O anel nunca
+    passa de MAX_VERTICES_REAMOSTRAGEM vértices.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Descarta vértices repetidos (arestas de comprimento zero)
+    d = np.hypot(np.roll(x, -1) - x, np.roll(y, -1) - y)
+    x, y = x[d > 0], y[d > 0]
+    if len(x) < 3:
+        return x, y
+
+    xc, yc = np.append(x, x[0]), np.append(y, y[0])
+    s = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(xc), np.diff(yc)))))
+
+    # s_ef: comprimento de arco ponderado em cada posição s_ref do contorno
+    if fator_curvatura > 0:
+        s_ref, s_ef = _arco_ponderado(xc, yc, s, espacamento, fator_curvatura)
+    else:
+        s_ref, s_ef = s, s
+
+    n = min(max(3, int(round(s_ef[-1] / espacamento))), MAX_VERTICES_REAMOSTRAGEM)
+    alvo = np.interp(np.linspace(0.0, s_ef[-1], n, endpoint=False), s_ef, s_ref)
+    return np.interp(alvo, s, xc), np.interp(alvo, s, yc)
+
+
+def _arco_ponderado(xc, yc, s, espacamento, fator_curvatura):
+    """Grade uniforme do anel fechado e o comprimento de arco ponderado pelo giro em cada nó."""
+    passo = max(espacamento / 4, s[-1] / (4 * MAX_VERTICES_REAMOSTRAGEM))
+    m = max(int(np.ceil(s[-1] / passo)), 3)
+    sg = np.linspace(0.0, s[-1], m + 1)
+    direcao = np.arctan2(np.diff(np.interp(sg, s, yc)), np.diff(np.interp(sg, s, xc)))
+    giro = np.abs(np.angle(np.exp(1j * (direcao - np.roll(direcao, 1)))))
+
+    # Soma circular do giro em ±espacamento ao redor de cada nó
+    k = min(int(np.ceil(espacamento / passo)), m // 2)
+    giro = np.convolve(np.concatenate((giro[m - k:], giro, giro[:k])), np.ones(2 * k + 1), "valid")
+
+    peso_no = 1.0 + fator_curvatura * giro / np.pi
+    peso = 0.5 * (peso_no + np.roll(peso_no, -1))
+    return sg, np.concatenate(([0.0], np.cumsum(np.diff(sg) * peso)))
+
+
+class _CacheFragmentosGeo:
+    """Cache LRU dos trechos Point/Line/Line Loop de cada anel no .geo, compartilhado entre sessões.
+
+    A chave inclui o conteúdo do anel, os ids iniciais e os parâmetros de reamostragem; como
+    as ilhas só entram e saem no fim da lista, os anéis anteriores mantêm os mesmos ids e
+    são reaproveitados na próxima exportação.
+    """
+
+    def __init__(self, limite_caracteres):
+        self._limite = limite_caracteres
+        self._tamanho = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+            return item
+
+    def guardar(self, chave, item):
+        with self._trava:
+            if chave in self._itens:
+                return
+            self._itens[chave] = item
+            self._tamanho += len(item[0])
+            while self._tamanho > self._limite and len(self._itens) > 1:
+                _, (texto, _) = self._itens.popitem(last=False)
+                self._tamanho -= len(texto)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self._tamanho = 0
+
+
+# Limite do cache de trechos do .geo, em caracteres
+LIMITE_CACHE_GEO = 64_000_000
+
+_cache_geo = _CacheFragmentosGeo(LIMITE_CACHE_GEO)
+
+
+def _fragmento_geo(pontos, p_ini, loop_num, espacamento, fator_curvatura, projecao):
+    """Gera o trecho do .geo de um anel começando no ponto/linha ``p_ini``; retorna (texto, n_pontos)."""
+    pontos = np.ascontiguousarray(pontos, dtype=np.float64)
+    chave = (
+        hashlib.blake2b(pontos.tobytes(), digest_size=16).digest(),
+        p_ini, loop_num, espacamento, fator_curvatura, projecao,
+    )
+    item = _cache_geo.obter(chave)
+    if item is not None:
+        return item
+
+    xs, ys = projecao.projetar(pontos[:, 0], pontos[:, 1])
+    if espacamento:
+        xs, ys = reamostrar_anel(xs, ys, espacamento, fator_curvatura)
+    n = len(xs)
+
+    saida = []
+    for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+        saida.append(f"Point({p_ini + i}) = {{ {x:.4f}, {y:.4f}, 0 }};")
+
+    # Cada anel tem tantas linhas quanto pontos, então os ids de linha seguem os de ponto
+    for i in range(n):
+        saida.append(f"Line({p_ini + i}) = {{ {p_ini + i}, {p_ini + (i + 1) % n} }};")
+
+    all_lines = range(p_ini, p_ini + n)
+    saida.append(f"Line Loop({loop_num}) = {{ {', '.join(map(str, all_lines))} }};")
+    saida.append("")
+
+    item = ("\n".join(saida), n)
+    _cache_geo.guardar(chave, item)
+    return item
+
+
+def _cabecalho_projecao(projecao):
+    """Linhas de comentário do GMSH que identificam a projeção das coordenadas."""
+    return [f"// Projeção: {projecao.descricao}", f"// PROJ: {projecao.proj}"]
+
+
+def gerar_gmsh(rio, ilhas, espacamento=None, fator_curvatura=0.0, projecao=None):
+    """Gera o arquivo .geo no formato GMSH para todas as poligonais.
+
+    Todos os anéis usam a ``projecao`` do projeto (por padrão, escolher_projecao do Rio),
+    registrada no cabeçalho. Com ``espacamento`` (m), cada anel é reamostrado antes de
+    gerar os pontos. Os trechos de cada anel vêm do cache quando o anel e seus ids não mudaram.
+    """
+    if rio is None or len(rio) == 0:
+        return None, "Nenhuma poligonal disponível para exportar!"
+    if projecao is None:
+        projecao = escolher_projecao(rio)
+
+    saida = []
+    pid = 1
+    loops = []
+
+    saida += _cabecalho_projecao(projecao)
+    if espacamento:
+        saida.append(f"// Arestas reamostradas a cada {espacamento:g} m (fator de curvatura {fator_curvatura:g})")
+    saida.append("")
+
+    todas = [rio] + list(ilhas)
+
+    for idx, pontos in enumerate(todas):
+        loop_num = idx + 1
+        texto, n = _fragmento_geo(pontos, pid, loop_num, espacamento, fator_curvatura, projecao)
+        saida.append(texto)
+        pid += n
+        loops.append(loop_num)
+
+    saida.append(f"Plane Surface(1) = {{ {', '.join(map(str, loops))} }};")
+
+    return "\n".join(saida).encode("utf-8"), None
+
+
+def gerar_malha(rio, ilhas, espacamento=None, fator_curvatura=0.0, formatos=("msh",), projecao=None):
+    """Gera a malha 2D a partir do .geo usando a API Python do gmsh, se instalada.
+
+    ``formatos`` escolhe os arquivos devolvidos entre "msh" (ASCII do gmsh), "vtu" e "xdmf"
+    (binários, gravados direto dos arrays de nós/triângulos). Retorna ({nome: bytes}, erro).
+    """
+    try:
+        import gmsh
+    except (ImportError, OSError):
+        return None, "Pacote gmsh não instalado; malha não incluída."
+    from poligonal_malha import arrays_gmsh, escrever_vtu, escrever_xdmf
+
+    geo_bytes, erro = gerar_gmsh(rio, ilhas, espacamento, fator_curvatura, projecao)
+    if erro:
+        return None, erro
+
+    with tempfile.TemporaryDirectory() as pasta, _TRAVA_GMSH:
+        caminho_geo = os.path.join(pasta, "poligonais.geo")
+        caminho_msh = os.path.join(pasta, "poligonais.msh")
+        with open(caminho_geo, "wb") as f:
+            f.write(geo_bytes)
+
+        criados = []
+        # interruptible=False: fora da thread principal o gmsh não pode instalar handler de sinal
+        gmsh.initialize(interruptible=False)
+        try:
+            gmsh.option.setNumber("General.Terminal", 0)
+            gmsh.open(caminho_geo)
+            gmsh.model.mesh.generate(2)
+            if "msh" in formatos:
+                gmsh.write(caminho_msh)
+                criados.append(caminho_msh)
+            if "vtu" in formatos or "xdmf" in formatos:
+                nos, triangulos = arrays_gmsh(gmsh)
+        finally:
+            gmsh.finalize()
+
+        if "vtu" in formatos:
+            caminho_vtu = os.path.join(pasta, "poligonais.vtu")
+            escrever_vtu(caminho_vtu, nos, triangulos)
+            criados.append(caminho_vtu)
+        if "xdmf" in formatos:
+            caminho_xdmf = os.path.join(pasta, "poligonais.xdmf")
+            try:
+                criados += escrever_xdmf(caminho_xdmf, nos, triangulos)
+            except ValueError:  # sem h5py: dados em .bin brutos ao lado do .xdmf
+                criados += escrever_xdmf(caminho_xdmf, nos, triangulos, formato="binario")
+
+        arquivos = {}
+        for caminho in criados:
+            with open(caminho, "rb") as f:
+                arquivos[os.path.basename(caminho)] = f.read()
+        return arquivos, None
+
+
+def exportar_tudo(rio, ilhas, incluir_malha=False, max_workers=4, espacamento=None, fator_curvatura=0.0,
+                  formatos_malha=("msh", "vtu"), projecao=None):
+    """Gera xlsx, .geo, CSV geodésico e (opcional) malha em paralelo e junta tudo em um .zip."""
+    if rio is None or len(rio) == 0:
+        return None, ["Nenhuma poligonal disponível para exportar!"]
+    if projecao is None:
+        projecao = escolher_projecao(rio)
+
+    # Cópias próprias: as threads não devem ver alterações feitas no session_state
+    rio = np.array(rio, dtype=np.float64)
+    ilhas = [np.array(poligono, dtype=np.float64) for poligono in ilhas]
+
+    tarefas = {
+        "poligonais.xlsx": lambda: _planilha_bytes(rio, ilhas),
+        "poligonais.geo": lambda: gerar_gmsh(rio, ilhas, espacamento, fator_curvatura, projecao),
+        "poligonais_geodesicas.csv": lambda: exportar_geodesicas(rio, ilhas),
+    }
+    if incluir_malha:
+        tarefas["malha"] = lambda: gerar_malha(rio, ilhas, espacamento, fator_curvatura, formatos_malha, projecao)
+
+    avisos = []
+    output = BytesIO()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tarefas))) as pool, \
+            zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        futuros = {pool.submit(tarefa): nome for nome, tarefa in tarefas.items()}
+        # Cada arquivo entra no .zip assim que fica pronto
+        for futuro in as_completed(futuros):
+            nome = futuros[futuro]
+            try:
+                conteudo, erro = futuro.result()
+            except Exception as e:
+                conteudo, erro = None, f"{nome}: {str(e)}"
+            if erro:
+                avisos.append(erro)
+            elif isinstance(conteudo, dict):  # a malha pode gerar vários arquivos
+                for nome_arquivo, dados in conteudo.items():
+                    zf.writestr(nome_arquivo, dados)
+            else:
+                # O .xlsx já é um zip: comprimir de novo só gasta tempo
+                zf.writestr(nome, conteudo, compress_type=zipfile.ZIP_STORED if nome.endswith(".xlsx") else None)
+
+    output.seek(0)
+    return output, avisos
+
+
+def _escrever_xlsx(colunas, aba="Poligonais"):
+    """Grava as colunas ({título: valores}) direto com o xlsxwriter, coluna a coluna.
+
+    Evita o ``DataFrame.to_excel``, que passa célula a célula pelo pandas e era a etapa
+    mais lenta das exportações; a planilha gerada é a mesma.
+    """
+    import xlsxwriter
+
+    output = BytesIO()
+    with xlsxwriter.Workbook(output, {"in_memory": True, "nan_inf_to_errors": True}) as workbook:
+        planilha = workbook.add_worksheet(aba)
+        planilha.write_row(0, 0, list(colunas))
+        for j, valores in enumerate(colunas.values()):
+            planilha.write_column(1, j, np.asarray(valores).tolist())
+    output.seek(0)
+    return output
+
+
+def _colunas_planilha(rio, ilhas):
+    """Colunas da planilha de salvar_coordenadas ({título: array}) ou None sem poligonais."""
+    aneis = _aneis_nomeados(rio, ilhas)
+    if not aneis:
+        return None
+
+    pontos = np.concatenate([p for _, p in aneis])
+    tamanhos = [len(p) for _, p in aneis]
+    # Fuso de cada ponto só para informação; as exportações usam a projeção do projeto
+    fuso = ((pontos[:, 1] + 180) / 6).astype(np.int64) + 1
+    hemi = np.where(pontos[:, 0] < 0, "S", "N")
+    return {
+        "Tipo": np.repeat([nome for nome, _ in aneis], tamanhos),
+        "Ponto": np.concatenate([np.arange(1, n + 1) for n in tamanhos]),
+        "Latitude": pontos[:, 0],
+        "Longitude": pontos[:, 1],
+        "Fuso UTM": np.char.add(fuso.astype(str), hemi),
+    }
+
+
+def _planilha_bytes(rio, ilhas):
+    """Bytes do .xlsx de salvar_coordenadas, sem montar o DataFrame (usado por exportar_tudo)."""
+    colunas = _colunas_planilha(rio, ilhas)
+    if colunas is None:
+        return None, "Nenhuma poligonal disponível para salvar!"
+    return _escrever_xlsx(colunas).getvalue(), None
+
+
+def salvar_coordenadas(rio, ilhas, colunas=None):
+    """Salva todas as poligonais em um arquivo Excel e gera um link para download.
+
+    ``colunas`` restringe (e ordena) as colunas da planilha; por padrão vão todas
+    (Tipo, Ponto, Latitude, Longitude, Fuso UTM).
+    """
+    import pandas as pd  # pandas/xlsxwriter só são carregados na primeira exportação
+
+    # Rio primeiro, depois as ilhas
+    planilha = _colunas_planilha(rio, ilhas)
+    if planilha is None:
+        return None
+    if colunas is not None:
+        planilha = {titulo: planilha[titulo] for titulo in colunas}
+    return _escrever_xlsx(planilha), pd.DataFrame(planilha)
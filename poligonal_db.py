@@ -0,0 +1,129 @@
+"""Armazenamento persistente dos projetos em SQLite (modo WAL).
+
+Cada anel finalizado é uma linha de ``aneis`` com as coordenadas [lat, lon] empacotadas
+em um BLOB float64 little-endian, lido de volta com ``np.frombuffer`` sem conversões.
+O Streamlit roda cada rerun em uma thread nova, então as conexões ficam em um pool do
+processo e são emprestadas a cada operação; o esquema é criado uma vez por processo. Com
+WAL as leituras não esperam pelas gravações e as gravações de sessões diferentes só se
+enfileiram pelo tempo de uma transação curta.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+CAMINHO_PADRAO = os.environ.get("POLIGONAL_DB", "poligonais.db")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS projetos (
+    id TEXT PRIMARY KEY,
+    atualizado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aneis (
+    projeto TEXT NOT NULL,
+    ordem INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    coords BLOB NOT NULL,
+    PRIMARY KEY (projeto, ordem)
+) WITHOUT ROWID;
+"""
+
+# Conexões livres por caminho do banco; acima de MAX_OCIOSAS as devolvidas são fechadas
+MAX_OCIOSAS = 8
+_ociosas = {}
+_com_esquema = set()
+_trava = threading.Lock()
+_trava_esquema = threading.Lock()
+
+
+def _abrir(caminho):
+    conexao = sqlite3.connect(caminho, timeout=10.0, isolation_level=None, check_same_thread=False)
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    with _trava_esquema:
+        if caminho not in _com_esquema:
+            conexao.execute("PRAGMA journal_mode=WAL")  # fica gravado no arquivo do banco
+            conexao.executescript(_ESQUEMA)
+            _com_esquema.add(caminho)
+    return conexao
+
+
+@contextmanager
+def conectar(caminho=CAMINHO_PADRAO):
+    """Empresta uma conexão do pool do processo, abrindo outra se não houver livre."""
+    with _trava:
+        livres = _ociosas.setdefault(caminho, [])
+        conexao = livres.pop() if livres else None
+    if conexao is None:
+        conexao = _abrir(caminho)
+    try:
+        yield conexao
+    finally:
+        if conexao.in_transaction:
+            conexao.rollback()
+        with _trava:
+            devolver = len(livres) < MAX_OCIOSAS
+            if devolver:
+                livres.append(conexao)
+        if not devolver:
+            conexao.close()
+
+
+def _tipo(ordem):
+    return "Rio" if ordem == 0 else f"Ilha_{ordem}"
+
+
+def _blob(anel):
+    return np.ascontiguousarray(anel, dtype="<f8").reshape(-1, 2).tobytes()
+
+
+def _tocar(conexao, projeto):
+    conexao.execute(
+        "INSERT INTO projetos (id, atualizado) VALUES (?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET atualizado = excluded.atualizado",
+        (projeto, time.time()),
+    )
+
+
+def salvar_projeto(projeto, aneis, caminho=CAMINHO_PADRAO):
+    """Substitui todos os anéis do projeto (Rio primeiro) em uma única transação."""
+    with conectar(caminho) as conexao, conexao:
+        conexao.execute("BEGIN IMMEDIATE")
+        conexao.execute("DELETE FROM aneis WHERE projeto = ?", (projeto,))
+        conexao.executemany(
+            "INSERT INTO aneis (projeto, ordem, tipo, n, coords) VALUES (?, ?, ?, ?, ?)",
+            ((projeto, i, _tipo(i), len(a), _blob(a)) for i, a in enumerate(aneis)),
+        )
+        _tocar(conexao, projeto)
+
+
+def salvar_anel(projeto, ordem, anel, caminho=CAMINHO_PADRAO):
+    """Grava só o anel ``ordem`` (ex.: ao finalizar uma ilha) e descarta os posteriores."""
+    with conectar(caminho) as conexao, conexao:
+        conexao.execute("BEGIN IMMEDIATE")
+        conexao.execute("DELETE FROM aneis WHERE projeto = ? AND ordem >= ?", (projeto, ordem))
+        conexao.execute(
+            "INSERT INTO aneis (projeto, ordem, tipo, n, coords) VALUES (?, ?, ?, ?, ?)",
+            (projeto, ordem, _tipo(ordem), len(anel), _blob(anel)),
+        )
+        _tocar(conexao, projeto)
+
+
+def remover_aneis(projeto, a_partir_de, caminho=CAMINHO_PADRAO):
+    """Remove os anéis com ordem >= ``a_partir_de`` (ex.: ao remover a última poligonal)."""
+    with conectar(caminho) as conexao, conexao:
+        conexao.execute("BEGIN IMMEDIATE")
+        conexao.execute("DELETE FROM aneis WHERE projeto = ? AND ordem >= ?", (projeto, a_partir_de))
+        _tocar(conexao, projeto)
+
+
+def carregar_projeto(projeto, caminho=CAMINHO_PADRAO):
+    """Lê os anéis do projeto na ordem (Rio primeiro) como arrays N x 2; lista vazia se não existir."""
+    with conectar(caminho) as conexao:
+        linhas = conexao.execute(
+            "SELECT coords FROM aneis WHERE projeto = ? ORDER BY ordem", (projeto,)
+        ).fetchall()
+    return [np.frombuffer(coords, dtype="<f8").reshape(-1, 2) for (coords,) in linhas]
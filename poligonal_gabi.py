@@ -1,13 +1,17 @@
-import math
+import sqlite3
+import uuid
 import streamlit as st
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import folium
 from streamlit_folium import st_folium
-import pandas as pd
-from io import BytesIO
+from poligonal_core import MAX_VERTICES_REAMOSTRAGEM, exportar_tudo, gerar_gmsh, salvar_coordenadas
+from poligonal_codec import codificar_binario, decodificar_binario, gerar_token, ler_token, quantizar
+from poligonal_db import carregar_projeto, remover_aneis, salvar_anel, salvar_projeto
+from poligonal_import import EXTENSOES, importar_contornos
+from poligonal_medicao import encerrar_rerun, medidor_da_sessao
+from poligonal_store import PoligonalStore
 
 st.set_page_config(page_title="Mundo Poligonal", layout="wide")
+medidor = medidor_da_sessao("poligonal_gabi")  # Tempos das fases deste rerun (?debug=1 mostra o painel)
 st.title("🌐Mapa com Poligonais Interativas")
 
 # ✅ Passo a passo logo no início
@@ -32,10 +36,24 @@ with st.expander("ℹ️ Como usar o sistema", expanded=True):
        - Adicione novos pontos no mapa
        - Clique em 🔚 **Finalizar Poligonal da Ilha**
        - Repita para múltiplas ilhas
+    3. **Importar contornos prontos**:
+       - Envie um GeoJSON, Shapefile (.zip com .shp/.shx/.dbf) ou KML/KMZ em 📂 **Importar Contornos**
+       - Clique em 📥 **Importar Rio e Ilhas**
+       - O maior polígono vira o Rio; seus buracos e os polígonos dentro dele viram Ilhas
+       - As poligonais atuais são substituídas (use ↩️ Desfazer para voltar)
+
+    #### 💾 Projeto
+    - 💾 **Salvar Projeto (.plg)**: baixa um arquivo compacto com o Rio e as Ilhas
+    - 📂 **Abrir Projeto**: recarrega um arquivo .plg salvo antes
+    - 🔗 **Gerar Link de Compartilhamento**: cria um link só com o projeto (ou copie o token);
+      quem abre o link recebe uma cópia, sem alterar o seu projeto
+    - As poligonais finalizadas são salvas automaticamente no servidor: recarregar a página
+      (mantendo o `?id=` do link) restaura o projeto
 
     #### 🛠️ Ferramentas de Edição
     - ❌ **Apagar Última Coordenada**: Remove o último ponto adicionado
     - 🗑️ **Remover Última Poligonal**: Exclui a última poligonal salva
+    - ↩️ **Desfazer** / ↪️ **Refazer**: Volta ou reaplica a última alteração
     - 🔃 **Reiniciar Tudo** (com confirmação):
        - Volta para a posição inicial
        - Remove TODAS as poligonais
@@ -52,10 +70,21 @@ with st.expander("ℹ️ Como usar o sistema", expanded=True):
     2. Baixe o arquivo com 📥 **Baixar Arquivo .geo**
     3. Abra o arquivo no aplicativo **GMSH 2.10.1 para Windows**
     - As coordenadas são convertidas automaticamente de lat/lon para **UTM (metros)**
-    - A zona UTM é determinada automaticamente pela localização da poligonal
+    - A projeção é escolhida uma única vez para o projeto, ao finalizar o Rio: a zona UTM
+      dominante ou, se o Rio atravessar várias zonas, uma Transversa de Mercator local,
+      registrada no cabeçalho do .geo
     - O arquivo pode ser aberto diretamente no GMSH para geração de malhas
+    - Opcional: defina o **Espaçamento das arestas** para redistribuir os vértices a cada N metros
+      (e o **Refinamento por curvatura** para concentrar vértices nas curvas) antes de exportar
     - 📥 Download do GMSH 2.10.1: https://gmsh.info/bin/Windows/
 
+    **Pacote completo (.zip)**
+    1. Clique em 📦 **Exportar Tudo (.zip)**
+    2. Baixe o arquivo com 📥 **Baixar Pacote .zip**
+    - Contém o Excel, o .geo e o CSV geodésico (decimal + DMS), gerados em paralelo
+    - Marque **Incluir malha** para gerar também a malha 2D (requer o pacote `gmsh`)
+      em .msh e/ou nos formatos binários .vtu e .xdmf (abertos direto no ParaView)
+
     #### ⚠️ Boas Práticas
     - Sempre comece pela poligonal do rio
     - Use zoom próximo (nível 15+) para maior precisão
@@ -65,31 +94,57 @@ with st.expander("ℹ️ Como usar o sistema", expanded=True):
     """)
 
 # Inicializar variáveis no session_state para armazenar dados ao longo da execução
-if "coordenadas" not in st.session_state:
-    st.session_state.coordenadas = []  # Lista de coordenadas temporárias para a poligonal atual
-
-if "poligonal_principal" not in st.session_state:
-    st.session_state.poligonal_principal = None  # Guarda a poligonal principal salva
-
-if "poligonais_secundarias" not in st.session_state:
-    st.session_state.poligonais_secundarias = []  # Lista de poligonais secundárias
-
 if "ultimo_ponto" not in st.session_state:
     st.session_state.ultimo_ponto = [-15.608041311445879, -56.06389224529267]  # Ponto inicial no mapa (Liama)
 
 if "mensagens" not in st.session_state:
     st.session_state.mensagens = []  # Lista para armazenar mensagens de status
 
+# Cada navegador trabalha em um projeto identificado por ?id= na URL; as poligonais finalizadas
+# ficam no SQLite e voltam ao recarregar a página ou reiniciar o servidor
+if "projeto_id" not in st.session_state:
+    st.session_state.projeto_id = st.query_params.get("id") or uuid.uuid4().hex[:12]
+    st.query_params["id"] = st.session_state.projeto_id
+
+if "poligonos" not in st.session_state:
+    # Rio, ilhas e poligonal atual em um único buffer
+    try:
+        aneis_salvos = carregar_projeto(st.session_state.projeto_id)
+        st.session_state.poligonos = PoligonalStore.a_partir_de(aneis_salvos)
+    except (sqlite3.Error, ValueError) as e:
+        aneis_salvos = []
+        st.session_state.poligonos = PoligonalStore()
+        st.session_state.mensagens.append(f"⚠️ Não foi possível restaurar o projeto salvo: {str(e)}")
+    if aneis_salvos:
+        st.session_state.ultimo_ponto = aneis_salvos[0].mean(axis=0).tolist()
+        st.session_state.mensagens.append(f"♻️ Projeto restaurado: Rio e {len(aneis_salvos) - 1} ilha(s)!")
+
+poligonos = st.session_state.poligonos
+
+
+def autosalvar(gravar, *args):
+    """Grava a alteração no SQLite; uma falha no banco não interrompe a edição."""
+    try:
+        with medidor.fase("banco"):
+            gravar(st.session_state.projeto_id, *args)
+    except sqlite3.Error as e:
+        st.session_state.mensagens.append(f"⚠️ Falha ao salvar automaticamente: {str(e)}")
+
 # Barra de busca de cidades
 st.sidebar.subheader("🔍 Buscar Localização")
 cidade = st.sidebar.text_input("Digite uma cidade, endereço ou ponto de interesse:")
 
 if st.sidebar.button("Buscar"):
     if cidade:
+        # geopy só é carregado quando o usuário faz uma busca
+        from geopy.geocoders import Nominatim
+        from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+
         try:
             with st.spinner("Buscando localização..."):
                 geolocator = Nominatim(user_agent="streamlit_map_search")
-                location = geolocator.geocode(cidade, timeout=10)
+                with medidor.fase("geocodificacao"):
+                    location = geolocator.geocode(cidade, timeout=10)
 
                 if location:
                     # Atualiza os estados globais com a nova localização
@@ -113,91 +168,205 @@ if st.sidebar.button("Buscar"):
         except Exception as e:
             st.sidebar.error(f"❌ Erro inesperado: {str(e)}")
 
+# Importação de contornos já existentes (substitui as poligonais atuais em um único passo)
+st.sidebar.subheader("📂 Importar Contornos")
+arquivo_contorno = st.sidebar.file_uploader("GeoJSON, Shapefile (.zip) ou KML/KMZ", type=EXTENSOES)
+
+if arquivo_contorno is not None and st.sidebar.button("📥 Importar Rio e Ilhas"):
+    with st.spinner("Lendo contornos..."), medidor.fase("importar"):
+        rio, ilhas, ignorados, erro = importar_contornos(arquivo_contorno.name, arquivo_contorno)
+    if erro:
+        st.sidebar.error(f"❌ {erro}")
+    else:
+        poligonos.substituir([rio] + ilhas)
+        autosalvar(salvar_projeto, poligonos.aneis)
+        st.session_state.ultimo_ponto = rio.mean(axis=0).tolist()  # Centraliza no rio importado
+        mensagem = f"📂 Rio e {len(ilhas)} ilha(s) importados de {arquivo_contorno.name}!"
+        if ignorados:
+            mensagem += f" ({ignorados} polígono(s) fora do rio ignorado(s))"
+        st.session_state.mensagens.append(mensagem)
+        st.rerun()
+
+# Salvar/abrir o projeto no formato compacto (.plg) e compartilhar por link
+st.sidebar.subheader("💾 Projeto")
+
+def abrir_projeto(aneis, origem):
+    """Substitui as poligonais pelas do projeto (Rio primeiro) e centraliza o mapa."""
+    if not poligonos.substituir(aneis):
+        st.session_state.mensagens.append(f"⚠️ Projeto de {origem} ignorado: há poligonais com menos de 3 pontos.")
+        return
+    autosalvar(salvar_projeto, poligonos.aneis)
+    st.session_state.ultimo_ponto = aneis[0].mean(axis=0).tolist()
+    st.session_state.mensagens.append(f"📂 Projeto carregado de {origem}: Rio e {len(aneis) - 1} ilha(s)!")
+
+# Link compartilhado (?projeto=<token>): sai da URL assim que é aplicado ou descartado, e só
+# substitui um projeto que já tem poligonais salvas com a confirmação do usuário
+token_url = st.query_params.get("projeto")
+if token_url:
+    try:
+        aneis = ler_token(token_url)
+    except ValueError as e:
+        del st.query_params["projeto"]
+        st.sidebar.error(f"❌ {str(e)}")
+    else:
+        if not aneis:
+            del st.query_params["projeto"]
+        elif not poligonos.n_aneis:
+            del st.query_params["projeto"]
+            abrir_projeto(aneis, "link")
+            st.rerun()
+        else:
+            st.sidebar.warning(f"⚠️ O link traz um projeto com Rio e {len(aneis) - 1} ilha(s). "
+                               "Substituir as poligonais salvas deste projeto?")
+            col_substituir, col_manter = st.sidebar.columns(2)
+            if col_substituir.button("🔁 Substituir"):
+                del st.query_params["projeto"]
+                abrir_projeto(aneis, "link")
+                st.rerun()
+            if col_manter.button("✋ Manter atual"):
+                del st.query_params["projeto"]
+                st.rerun()
+
+if poligonos.poligonal_principal is not None:
+    aneis_projeto = [poligonos.poligonal_principal] + poligonos.poligonais_secundarias
+    if st.sidebar.button("💾 Salvar Projeto (.plg)"):
+        st.sidebar.download_button(
+            label="📥 Baixar Projeto",
+            data=codificar_binario(aneis_projeto),
+            file_name="projeto.plg",
+            mime="application/octet-stream"
+        )
+    if st.sidebar.button("🔗 Gerar Link de Compartilhamento"):
+        token = gerar_token(aneis_projeto)
+        # O link leva só o token: o ?id= deste navegador continua privado
+        st.sidebar.success("✅ Link gerado! Copie o link abaixo ou o token do projeto:")
+        st.sidebar.markdown(f"[🔗 Link do projeto](?projeto={token})")
+        st.sidebar.code(token)
+
+arquivo_projeto = st.sidebar.file_uploader("Abrir projeto (.plg)", type=["plg"])
+if arquivo_projeto is not None and st.sidebar.button("📂 Abrir Projeto"):
+    try:
+        aneis = decodificar_binario(arquivo_projeto.getvalue())
+    except ValueError as e:
+        st.sidebar.error(f"❌ {str(e)}")
+    else:
+        if aneis:
+            abrir_projeto(aneis, arquivo_projeto.name)
+            st.rerun()
+        st.sidebar.warning("⚠️ O projeto não contém poligonais!")
+
+token_colado = st.sidebar.text_input("Ou cole um token de projeto:")
+if token_colado and st.sidebar.button("🔗 Carregar Token"):
+    try:
+        aneis = ler_token(token_colado)
+    except ValueError as e:
+        st.sidebar.error(f"❌ {str(e)}")
+    else:
+        if aneis:
+            abrir_projeto(aneis, "token")
+            st.rerun()
+        st.sidebar.warning("⚠️ O projeto não contém poligonais!")
+
+# Acima deste número de vértices a poligonal é desenhada sem os marcadores de cada ponto
+MAX_MARCADORES_POR_POLIGONAL = 500
+
 # Criando o mapa centralizado no último ponto adicionado
-zoom = st.session_state.get("zoom_level", 12)  # Usa o zoom_level se existir, senão usa 30
-mapa = folium.Map(location=st.session_state.ultimo_ponto, zoom_start=zoom)
+with medidor.fase("mapa"):
+    zoom = st.session_state.get("zoom_level", 12)  # Usa o zoom_level se existir, senão usa 30
+    mapa = folium.Map(location=st.session_state.ultimo_ponto, zoom_start=zoom)
 
 # Adicionando os pontos individuais ao mapa como marcadores circulares vermelhos
-for i, coord in enumerate(st.session_state.coordenadas):
-    folium.CircleMarker(
-        location=coord,
-        radius=4,
-        color="red",
-        fill=True,
-        fill_color="red",
-        fill_opacity=1.0,
-        tooltip=f"Ponto {i + 1} (lat: {coord[0]:.5f}, lon: {coord[1]:.5f})"
-    ).add_to(mapa)
+with medidor.fase("marcadores"):
+    for i, coord in enumerate(quantizar(poligonos.coordenadas)):
+        folium.CircleMarker(
+            location=coord,
+            radius=4,
+            color="red",
+            fill=True,
+            fill_color="red",
+            fill_opacity=1.0,
+            tooltip=f"Ponto {i + 1} (lat: {coord[0]:.5f}, lon: {coord[1]:.5f})"
+        ).add_to(mapa)
 
 # Adicionando a poligonal atual (se houver mais de 2 pontos)
-if len(st.session_state.coordenadas) > 2:
-    folium.Polygon(
-        locations=st.session_state.coordenadas,
-        color="blue",
-        weight=2,
-        fill=True,
-        fill_color="blue",
-        fill_opacity=0.4
-    ).add_to(mapa)
+if len(poligonos.coordenadas) > 2:
+    with medidor.fase("mapa"):
+        folium.Polygon(
+            locations=quantizar(poligonos.coordenadas),
+            color="blue",
+            weight=2,
+            fill=True,
+            fill_color="blue",
+            fill_opacity=0.4
+        ).add_to(mapa)
 
 # Adicionando a poligonal principal, se já foi salva
-if st.session_state.poligonal_principal:
-    folium.Polygon(
-        locations=st.session_state.poligonal_principal,
-        color="green",
-        weight=3,
-        fill=True,
-        fill_color="green",
-        fill_opacity=0.4
-    ).add_to(mapa)
-    for i, coord in enumerate(st.session_state.poligonal_principal):
-        folium.CircleMarker(
-            location=coord,
-            radius=4,
+if poligonos.poligonal_principal is not None:
+    with medidor.fase("mapa"):
+        rio = quantizar(poligonos.poligonal_principal)
+        folium.Polygon(
+            locations=rio,
             color="green",
+            weight=3,
             fill=True,
             fill_color="green",
-            fill_opacity=1.0,
-            tooltip=f"Rio - Ponto {i + 1} (lat: {coord[0]:.5f}, lon: {coord[1]:.5f})"
+            fill_opacity=0.4
         ).add_to(mapa)
+    if len(rio) <= MAX_MARCADORES_POR_POLIGONAL:
+        with medidor.fase("marcadores"):
+            for i, coord in enumerate(rio):
+                folium.CircleMarker(
+                    location=coord,
+                    radius=4,
+                    color="green",
+                    fill=True,
+                    fill_color="green",
+                    fill_opacity=1.0,
+                    tooltip=f"Rio - Ponto {i + 1} (lat: {coord[0]:.5f}, lon: {coord[1]:.5f})"
+                ).add_to(mapa)
 
 # Adicionando poligonais secundárias, se houver
-for idx, poligono in enumerate(st.session_state.poligonais_secundarias):
-    folium.Polygon(
-        locations=poligono,
-        color="magenta",  # Magenta para as poligonais secundárias
-        weight=2,
-        fill=True,
-        fill_color="magenta",
-        fill_opacity=0.4
-    ).add_to(mapa)
-    for i, coord in enumerate(poligono):
-        folium.CircleMarker(
-            location=coord,
-            radius=4,
-            color="magenta",
+for idx, poligono in enumerate(poligonos.poligonais_secundarias):
+    with medidor.fase("mapa"):
+        poligono = quantizar(poligono)
+        folium.Polygon(
+            locations=poligono,
+            color="magenta",  # Magenta para as poligonais secundárias
+            weight=2,
             fill=True,
             fill_color="magenta",
-            fill_opacity=1.0,
-            tooltip=f"Ilha_{idx + 1} - Ponto {i + 1} (lat: {coord[0]:.5f}, lon: {coord[1]:.5f})"
+            fill_opacity=0.4
         ).add_to(mapa)
+    if len(poligono) <= MAX_MARCADORES_POR_POLIGONAL:
+        with medidor.fase("marcadores"):
+            for i, coord in enumerate(poligono):
+                folium.CircleMarker(
+                    location=coord,
+                    radius=4,
+                    color="magenta",
+                    fill=True,
+                    fill_color="magenta",
+                    fill_opacity=1.0,
+                    tooltip=f"Ilha_{idx + 1} - Ponto {i + 1} (lat: {coord[0]:.5f}, lon: {coord[1]:.5f})"
+                ).add_to(mapa)
 
 # Renderizando o mapa interativo e capturando cliques do usuário
 st.subheader("Mapa Interativo")
-map_data = st_folium(
-    mapa,
-    height=700,
-    use_container_width=True,
-    returned_objects=["last_clicked", "zoom"]  # ← Captura também o zoom atual!
-)
+with medidor.fase("st_folium"):
+    map_data = st_folium(
+        mapa,
+        height=700,
+        use_container_width=True,
+        returned_objects=["last_clicked", "zoom"]  # ← Captura também o zoom atual!
+    )
 
 # Captura de cliques no mapa e adiciona novas coordenadas à lista
 if map_data and "last_clicked" in map_data and map_data["last_clicked"] is not None:
     novo_ponto = [map_data["last_clicked"]["lat"], map_data["last_clicked"]["lng"]]
     
     # Adiciona o novo ponto apenas se ele ainda não estiver na lista
-    if novo_ponto not in st.session_state.coordenadas:
-        st.session_state.coordenadas.append(novo_ponto)
+    if not poligonos.contem(*novo_ponto):
+        poligonos.adicionar_ponto(*novo_ponto)
         st.session_state.ultimo_ponto = novo_ponto  # Atualiza a centralização do mapa
         
         # ✅ Mantém o zoom atual (se disponível) em vez de resetar
@@ -208,19 +377,21 @@ if map_data and "last_clicked" in map_data and map_data["last_clicked"] is not N
 
 # Exibir as coordenadas utilizadas na poligonal atual
 #st.subheader("Coordenadas da Poligonal Atual")
-#st.write(st.session_state.coordenadas if st.session_state.coordenadas else "Nenhuma coordenada definida.")
+#st.write(poligonos.coordenadas if len(poligonos.coordenadas) else "Nenhuma coordenada definida.")
 
 # Botão para excluir a última poligonal salva
 if st.sidebar.button("🗑️ Remover Última Poligonal"):
-    if st.session_state.poligonais_secundarias:
+    if poligonos.n_ilhas:
         # Remove a última poligonal secundária e identifica qual foi removida
-        index_removida = len(st.session_state.poligonais_secundarias)  # Índice da última ilha
-        st.session_state.poligonais_secundarias.pop()
+        index_removida = poligonos.n_ilhas  # Índice da última ilha
+        poligonos.remover_ultima_poligonal()
+        autosalvar(remover_aneis, poligonos.n_aneis)
         st.session_state.mensagens.append(f"🗑️ Poligonal Ilha_{index_removida} removida com sucesso!")
         st.rerun()
-    elif st.session_state.poligonal_principal:
+    elif poligonos.poligonal_principal is not None:
         # Se não houver poligonais secundárias, remove a poligonal principal
-        st.session_state.poligonal_principal = None
+        poligonos.remover_ultima_poligonal()
+        autosalvar(remover_aneis, poligonos.n_aneis)
         st.session_state.mensagens.append("🗑️ Poligonal do Rio removida com sucesso!")
         st.rerun()
     else:
@@ -228,19 +399,39 @@ if st.sidebar.button("🗑️ Remover Última Poligonal"):
 
 # Botão para remover o último ponto adicionado
 if st.sidebar.button("❌ Apagar Última Coordenada"):
-    if st.session_state.coordenadas:
-        st.session_state.coordenadas.pop()  # Remove o último ponto da lista
+    if poligonos.apagar_ultimo_ponto():  # Remove o último ponto da poligonal atual
         st.success("🗑️ Último ponto removido!")
         st.rerun()
     else:
         st.warning("⚠️ Nenhum ponto para remover!")
 
+def autosalvar_historico(tipo, n_aneis_antes):
+    """Grava no banco só o que desfazer/refazer mudou nos anéis finalizados."""
+    if tipo in ("ponto", "apagar"):
+        return  # a poligonal em edição não é persistida
+    if tipo in ("finalizar", "remover") and poligonos.n_aneis > n_aneis_antes:
+        autosalvar(salvar_anel, poligonos.n_aneis - 1, poligonos.anel(poligonos.n_aneis - 1))
+    elif tipo in ("finalizar", "remover"):
+        autosalvar(remover_aneis, poligonos.n_aneis)
+    else:
+        autosalvar(salvar_projeto, poligonos.aneis)
+
+# Botões para desfazer/refazer a última alteração (pontos, finalizações e remoções)
+col_desfazer, col_refazer = st.sidebar.columns(2)
+if col_desfazer.button("↩️ Desfazer", disabled=not poligonos.pode_desfazer):
+    n_aneis_antes = poligonos.n_aneis
+    autosalvar_historico(poligonos.desfazer(), n_aneis_antes)
+    st.rerun()
+if col_refazer.button("↪️ Refazer", disabled=not poligonos.pode_refazer):
+    n_aneis_antes = poligonos.n_aneis
+    autosalvar_historico(poligonos.refazer(), n_aneis_antes)
+    st.rerun()
+
 # Botão para salvar a poligonal principal
-if not st.session_state.poligonal_principal:
+if poligonos.poligonal_principal is None:
     if st.sidebar.button("🔚 Finalizar Poligonal do Rio"):
-        if len(st.session_state.coordenadas) > 2:  # Exige ao menos 3 pontos
-            st.session_state.poligonal_principal = st.session_state.coordenadas.copy()
-            st.session_state.coordenadas = []  # Reseta a poligonal temporária
+        if poligonos.finalizar_poligonal():  # Exige ao menos 3 pontos
+            autosalvar(salvar_anel, poligonos.n_aneis - 1, poligonos.anel(poligonos.n_aneis - 1))
             st.session_state.mensagens.append("✅ Poligonal do Rio finalizada com sucesso!")
             st.rerun()
         else:
@@ -250,12 +441,11 @@ else:
 
 
 # Botão para salvar poligonais secundárias (apenas se a poligonal principal foi salva)
-if st.session_state.poligonal_principal:
+if poligonos.poligonal_principal is not None:
     if st.sidebar.button("🔚 Finalizar Poligonal da Ilha"):
-        if len(st.session_state.coordenadas) > 2:  # Exige ao menos 3 pontos
-            st.session_state.poligonais_secundarias.append(st.session_state.coordenadas.copy())
-            st.session_state.coordenadas = []  # Reseta a poligonal temporária
-            st.session_state.mensagens.append(f"✅ Poligonal Ilha_{len(st.session_state.poligonais_secundarias)} finalizada com sucesso!")
+        if poligonos.finalizar_poligonal():  # Exige ao menos 3 pontos
+            autosalvar(salvar_anel, poligonos.n_aneis - 1, poligonos.anel(poligonos.n_aneis - 1))
+            st.session_state.mensagens.append(f"✅ Poligonal Ilha_{poligonos.n_ilhas} finalizada com sucesso!")
             st.rerun()
         else:
             st.warning("⚠️ A poligonal deve ter pelo menos 3 pontos!")
@@ -267,148 +457,10 @@ st.sidebar.subheader("Status das Poligonais")
 for mensagem in st.session_state.mensagens:
     st.sidebar.success(mensagem)
 
-def _decimal_para_dms(graus, is_lat):
-    """Converte graus decimais para string DMS (graus°min'seg'')."""
-    hemisferio = ("S" if graus < 0 else "N") if is_lat else ("W" if graus < 0 else "E")
-    graus = abs(graus)
-    d = int(graus)
-    m = int((graus - d) * 60)
-    s = (graus - d - m / 60) * 3600
-    return f"{d}°{m}'{s:.4f}\"{hemisferio}"
-
-
-def exportar_geodesicas():
-    """Exporta coordenadas geodésicas (decimal + DMS) em CSV."""
-    if not st.session_state.poligonal_principal:
-        return None, "Nenhuma poligonal disponível para exportar!"
-
-    dados = []
-    todas = [("Rio", st.session_state.poligonal_principal)] + [
-        (f"Ilha_{i+1}", p) for i, p in enumerate(st.session_state.poligonais_secundarias)
-    ]
-    for nome, pontos in todas:
-        for lat, lon in pontos:
-            dados.append({
-                "Tipo": nome,
-                "Latitude (decimal)": lat,
-                "Longitude (decimal)": lon,
-                "Latitude (DMS)": _decimal_para_dms(lat, is_lat=True),
-                "Longitude (DMS)": _decimal_para_dms(lon, is_lat=False),
-            })
-
-    df = pd.DataFrame(dados)
-    return df.to_csv(index=False, sep=";", decimal=",").encode("utf-8"), None
-
-
-def _latlon_para_utm(lat, lon):
-    """Converte lat/lon WGS84 para coordenadas UTM (metros)."""
-    a = 6378137.0
-    f = 1 / 298.257223563
-    e2 = 2 * f - f ** 2
-    e2l = e2 / (1 - e2)
-    zona = int((lon + 180) / 6) + 1
-    lon0 = math.radians(-183 + zona * 6)
-    latr = math.radians(lat)
-    lonr = math.radians(lon)
-    N = a / math.sqrt(1 - e2 * math.sin(latr) ** 2)
-    T = math.tan(latr) ** 2
-    C = e2l * math.cos(latr) ** 2
-    A = math.cos(latr) * (lonr - lon0)
-    M = a * (
-        (1 - e2/4 - 3*e2**2/64 - 5*e2**3/256) * latr
-        - (3*e2/8 + 3*e2**2/32 + 45*e2**3/1024) * math.sin(2*latr)
-        + (15*e2**2/256 + 45*e2**3/1024) * math.sin(4*latr)
-        - (35*e2**3/3072) * math.sin(6*latr)
-    )
-    k0 = 0.9996
-    x = k0 * N * (A + (1-T+C)*A**3/6 + (5-18*T+T**2+72*C-58*e2l)*A**5/120) + 500000
-    y = k0 * (M + N * math.tan(latr) * (
-        A**2/2 + (5-T+9*C+4*C**2)*A**4/24 + (61-58*T+T**2+600*C-330*e2l)*A**6/720
-    ))
-    if lat < 0:
-        y += 10000000
-    return x, y, zona
-
-
-def gerar_gmsh():
-    """Gera o arquivo .geo no formato GMSH para todas as poligonais."""
-    if not st.session_state.poligonal_principal:
-        return None, "Nenhuma poligonal disponível para exportar!"
-
-    saida = []
-    pid = 1
-    lid = 1
-    loops = []
-
-    lat0, lon0_ref = st.session_state.poligonal_principal[0]
-    _, _, zona = _latlon_para_utm(lat0, lon0_ref)
-    hemi = "S" if lat0 < 0 else "N"
-    saida.append(f"// Projeção: UTM Zona {zona}{hemi} (WGS84)")
-    saida.append("")
-
-    todas = [st.session_state.poligonal_principal] + st.session_state.poligonais_secundarias
-
-    for idx, pontos in enumerate(todas):
-        n = len(pontos)
-        p_ini = pid
-        l_ini = lid
-        loop_num = idx + 1
-
-        for lat, lon in pontos:
-            x, y, _ = _latlon_para_utm(lat, lon)
-            saida.append(f"Point({pid}) = {{ {x:.4f}, {y:.4f}, 0 }};")
-            pid += 1
-
-        for i in range(n):
-            saida.append(f"Line({lid}) = {{ {p_ini + i}, {p_ini + (i + 1) % n} }};")
-            lid += 1
-
-        all_lines = list(range(l_ini, lid))
-        saida.append(f"Line Loop({loop_num}) = {{ {', '.join(map(str, all_lines))} }};")
-        saida.append("")
-        loops.append(loop_num)
-
-    saida.append(f"Plane Surface(1) = {{ {', '.join(map(str, loops))} }};")
-
-    return "\n".join(saida).encode("utf-8"), None
-
-
-# **Função para salvar todas as poligonais em um arquivo Excel**
-def salvar_coordenadas():
-    """Salva todas as poligonais em um arquivo Excel e gera um link para download."""
-    data = []
-
-    # Adiciona a poligonal principal ao conjunto de dados
-    if st.session_state.poligonal_principal:
-        for i, ponto in enumerate(st.session_state.poligonal_principal):
-            _, _, fuso = _latlon_para_utm(ponto[0], ponto[1])
-            hemi = "S" if ponto[0] < 0 else "N"
-            data.append(["Rio", i + 1, ponto[0], ponto[1], f"{fuso}{hemi}"])
-
-    # Adiciona as poligonais secundárias ao conjunto de dados
-    for idx, poligono in enumerate(st.session_state.poligonais_secundarias):
-        for i, ponto in enumerate(poligono):
-            _, _, fuso = _latlon_para_utm(ponto[0], ponto[1])
-            hemi = "S" if ponto[0] < 0 else "N"
-            data.append([f"Ilha_{idx+1}", i + 1, ponto[0], ponto[1], f"{fuso}{hemi}"])
-
-    if data:
-        # Criar um DataFrame do Pandas para armazenar os dados
-        df = pd.DataFrame(data, columns=["Tipo", "Ponto", "Latitude", "Longitude", "Fuso UTM"])
-        
-        # Criar um buffer de bytes para armazenar o arquivo Excel
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, sheet_name="Poligonais", index=False)
-        
-        output.seek(0)  # Retornar ao início do arquivo para o download
-        return output, df
-
-    return None
-
 # Botão para salvar todas as poligonais em um arquivo Excel e disponibilizar para download
 if st.sidebar.button("💾 Exportar em Excel"):
-    resultado = salvar_coordenadas()
+    with medidor.fase("exportar_excel"):
+        resultado = salvar_coordenadas(poligonos.poligonal_principal, poligonos.poligonais_secundarias)
 
     if resultado is None:
         st.warning("⚠️ Nenhuma poligonal disponível para salvar!")
@@ -428,9 +480,24 @@ if st.sidebar.button("💾 Exportar em Excel"):
             )
 
 
+# Reamostragem das arestas antes de gerar o .geo/malha (0 = mantém os pontos clicados)
+espacamento = st.sidebar.number_input(
+    "Espaçamento das arestas no GMSH (m)", min_value=0.0, value=0.0, step=10.0,
+    help=f"Redistribui os vértices de cada poligonal a cada N metros antes de gerar o arquivo GMSH (no máximo {MAX_VERTICES_REAMOSTRAGEM} vértices por poligonal). Use 0 para manter os pontos originais."
+)
+fator_curvatura = st.sidebar.slider(
+    "Refinamento por curvatura", min_value=0.0, max_value=5.0, value=0.0, step=0.5,
+    help="Aproxima os vértices onde o contorno faz curvas (0 = espaçamento uniforme)."
+)
+
 # Botão para exportar no formato GMSH (.geo)
 if st.sidebar.button("🔷 Exportar .geo"):
-    geo_bytes, erro = gerar_gmsh()
+    with medidor.fase("exportar_geo"):
+        geo_bytes, erro = gerar_gmsh(
+            poligonos.poligonal_principal, poligonos.poligonais_secundarias,
+            espacamento=espacamento or None, fator_curvatura=fator_curvatura,
+            projecao=poligonos.projecao
+        )
     if erro:
         st.warning(f"⚠️ {erro}")
     else:
@@ -441,8 +508,38 @@ if st.sidebar.button("🔷 Exportar .geo"):
             file_name="poligonais.geo",
             mime="text/plain"
         )
+if poligonos.projecao:
+    st.sidebar.caption(f"🗺️ Projeção do projeto: {poligonos.projecao.descricao}")
 st.sidebar.caption("ℹ️ O arquivo .geo deve ser aberto no **GMSH 2.10.1 para Windows**. [📥 Baixar aqui](https://gmsh.info/bin/Windows/)")
 
+# Botão para exportar todos os formatos de uma vez em um único .zip
+incluir_malha = st.sidebar.checkbox("Incluir malha no pacote", key="incluir_malha")
+formatos_malha = st.sidebar.multiselect(
+    "Formatos da malha", ["msh", "vtu", "xdmf"], default=["msh", "vtu"],
+    help="msh: ASCII do GMSH; vtu/xdmf: binários para ParaView e solvers (xdmf usa HDF5 se o h5py estiver instalado)."
+) if incluir_malha else []
+if st.sidebar.button("📦 Exportar Tudo (.zip)"):
+    with st.spinner("Gerando arquivos..."), medidor.fase("exportar_zip"):
+        pacote, avisos = exportar_tudo(
+            poligonos.poligonal_principal,
+            poligonos.poligonais_secundarias,
+            incluir_malha=incluir_malha and bool(formatos_malha),
+            formatos_malha=formatos_malha,
+            espacamento=espacamento or None,
+            fator_curvatura=fator_curvatura,
+            projecao=poligonos.projecao,
+        )
+    for aviso in avisos:
+        st.warning(f"⚠️ {aviso}")
+    if pacote:
+        st.success("✅ Pacote gerado com sucesso!")
+        st.download_button(
+            label="📥 Baixar Pacote .zip",
+            data=pacote,
+            file_name="poligonais.zip",
+            mime="application/zip"
+        )
+
 # Lógica: define a checkbox, mas ainda não exibe
 confirmar_remocao = st.session_state.get("confirmar_remocao", False)
 
@@ -450,9 +547,8 @@ confirmar_remocao = st.session_state.get("confirmar_remocao", False)
 if st.sidebar.button("🔃 Reiniciar Tudo"):
     if confirmar_remocao:
         # Limpa todos os dados
-        st.session_state.coordenadas = []
-        st.session_state.poligonal_principal = None
-        st.session_state.poligonais_secundarias = []
+        poligonos.reiniciar()
+        autosalvar(salvar_projeto, [])
         st.session_state.mensagens = []
         
         # Volta para posição inicial (Cuiabá/MT)
@@ -468,3 +564,5 @@ if st.sidebar.button("🔃 Reiniciar Tudo"):
 
 st.sidebar.checkbox("Confirmar exclusão", key="confirmar_remocao")
 
+encerrar_rerun(medidor)
+
@@ -0,0 +1,254 @@
+"""Importação de contornos de rio/ilhas a partir de GeoJSON, Shapefile e KML.
+
+Os arquivos são lidos feição a feição (ijson para GeoJSON, ``iterShapes`` do pyshp
+e ``iterparse`` para KML), sem montar o documento inteiro em memória. Os anéis são
+devolvidos como arrays N x 2 em [lat, lon], no mesmo formato do PoligonalStore.
+"""
+import json
+import os
+import struct
+import zipfile
+from io import BytesIO
+from xml.etree import ElementTree
+
+import numpy as np
+
+EXTENSOES = ["geojson", "json", "geojsonl", "geojsons", "zip", "shp", "kml", "kmz"]
+
+
+# ----------------------------------------------------------------- geometria
+
+def _anel(pontos_lonlat):
+    """Converte [[lon, lat(, alt)], ...] em array [lat, lon] sem o vértice de fechamento."""
+    if isinstance(pontos_lonlat, np.ndarray):
+        pontos = pontos_lonlat[:, :2]
+    else:
+        pontos = np.asarray([p[:2] for p in pontos_lonlat], dtype=np.float64).reshape(-1, 2)
+    anel = pontos[:, ::-1]
+    if len(anel) > 1 and np.array_equal(anel[0], anel[-1]):
+        anel = anel[:-1]
+    return np.ascontiguousarray(anel)
+
+
+def _area(anel):
+    """Área com sinal (fórmula do laço) em graus²; positiva no sentido anti-horário (lon, lat)."""
+    lat, lon = anel[:, 0], anel[:, 1]
+    return 0.5 * float(np.dot(lon, np.roll(lat, -1)) - np.dot(lat, np.roll(lon, -1)))
+
+
+def _contem(anel, lat, lon):
+    """Teste ponto-no-polígono (número de cruzamentos) vetorizado sobre as arestas."""
+    y1, x1 = anel[:, 0], anel[:, 1]
+    y2, x2 = np.roll(y1, -1), np.roll(x1, -1)
+    cruza = (y1 > lat) != (y2 > lat)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_corte = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+    return bool(np.count_nonzero(cruza & (lon < x_corte)) % 2)
+
+
+# ----------------------------------------------------------------- GeoJSON
+
+def _poligonos_geometria(geom):
+    """Extrai (exterior, [buracos]) de uma geometria GeoJSON; ignora o que não for objeto."""
+    if not isinstance(geom, dict):
+        return
+    tipo = geom.get("type")
+    if tipo == "Polygon":
+        aneis = geom["coordinates"]
+        if aneis:
+            yield _anel(aneis[0]), [_anel(a) for a in aneis[1:]]
+    elif tipo == "MultiPolygon":
+        for aneis in geom["coordinates"]:
+            if aneis:
+                yield _anel(aneis[0]), [_anel(a) for a in aneis[1:]]
+    elif tipo == "GeometryCollection":
+        for sub in geom.get("geometries", []):
+            yield from _poligonos_geometria(sub)
+
+
+def _geometria(feature):
+    return feature.get("geometry") if isinstance(feature, dict) else None
+
+
+def _poligonos_objeto(obj):
+    if not isinstance(obj, dict):
+        return
+    tipo = obj.get("type")
+    if tipo == "FeatureCollection":
+        for feature in obj.get("features", []):
+            yield from _poligonos_geometria(_geometria(feature))
+    elif tipo == "Feature":
+        yield from _poligonos_geometria(obj.get("geometry"))
+    else:
+        yield from _poligonos_geometria(obj)
+
+
+def ler_geojson(arquivo):
+    """Lê Polygon/MultiPolygon de um GeoJSON; usa ijson (se instalado) para ler feição a feição."""
+    try:
+        import ijson
+    except ImportError:
+        ijson = None
+
+    if ijson is not None:
+        encontrou = False
+        try:
+            for feature in ijson.items(arquivo, "features.item", use_float=True):
+                encontrou = True
+                yield from _poligonos_geometria(_geometria(feature))
+        except ijson.JSONError as e:
+            raise ValueError(f"GeoJSON inválido ({str(e)})")
+        if encontrou:
+            return
+        arquivo.seek(0)
+
+    # Feature/geometria isolada ou ijson indisponível: o documento é lido de uma vez
+    yield from _poligonos_objeto(json.load(arquivo))
+
+
+def ler_geojson_seq(arquivo):
+    """Lê GeoJSON delimitado por linha (uma feição por linha, RFC 8142)."""
+    for linha in arquivo:
+        linha = linha.strip().lstrip(b"\x1e")
+        if linha:
+            yield from _poligonos_objeto(json.loads(linha))
+
+
+# ----------------------------------------------------------------- Shapefile
+
+def ler_shapefile(shp, shx=None, dbf=None, prj=None):
+    """Lê os polígonos de um Shapefile em WGS84; anéis horários são externos e anti-horários, buracos."""
+    try:
+        import shapefile
+    except ImportError:
+        raise ValueError("Pacote pyshp não instalado; não é possível ler Shapefile.")
+
+    if prj is not None and "PROJCS" in prj.read().decode("utf-8", errors="ignore").upper():
+        raise ValueError("O Shapefile deve estar em coordenadas geográficas WGS84 (lat/lon).")
+
+    # Arquivos truncados ou corrompidos falham no pyshp com ShapefileException ou struct.error
+    try:
+        yield from _formas_shapefile(shapefile, shapefile.Reader(shp=shp, shx=shx, dbf=dbf))
+    except (shapefile.ShapefileException, struct.error) as e:
+        raise ValueError(f"Shapefile inválido ({str(e)})")
+
+
+def _formas_shapefile(shapefile, leitor):
+    """Agrupa as partes de cada forma em (anel externo, buracos)."""
+    for forma in leitor.iterShapes():
+        if forma.shapeType not in (shapefile.POLYGON, shapefile.POLYGONZ, shapefile.POLYGONM):
+            continue
+        pontos = np.asarray(forma.points, dtype=np.float64)
+        limites = list(forma.parts) + [len(pontos)]
+        exterior, buracos = None, []
+        for ini, fim in zip(limites[:-1], limites[1:]):
+            anel = _anel(pontos[ini:fim])
+            if _area(anel) < 0:  # horário: novo anel externo
+                if exterior is not None:
+                    yield exterior, buracos
+                exterior, buracos = anel, []
+            else:
+                buracos.append(anel)
+        if exterior is not None:
+            yield exterior, buracos
+
+
+def _ler_zip_shapefile(zf):
+    nomes = {os.path.splitext(n)[1].lower(): n for n in zf.namelist() if not n.startswith("__MACOSX")}
+    if ".shp" not in nomes:
+        raise ValueError("O arquivo .zip não contém um .shp.")
+
+    def abrir(ext):
+        return BytesIO(zf.read(nomes[ext])) if ext in nomes else None
+
+    yield from ler_shapefile(abrir(".shp"), abrir(".shx"), abrir(".dbf"), abrir(".prj"))
+
+
+# ----------------------------------------------------------------- KML
+
+def _coordenadas_kml(texto):
+    valores = [c.split(",") for c in (texto or "").split()]
+    return _anel([[float(v[0]), float(v[1])] for v in valores])
+
+
+def ler_kml(arquivo):
+    """Lê os Polygon de um KML com iterparse, liberando cada elemento após o uso."""
+    for _, elem in ElementTree.iterparse(arquivo, events=("end",)):
+        if elem.tag.rsplit("}", 1)[-1] != "Polygon":
+            continue
+        exterior, buracos = None, []
+        for fronteira in elem:
+            nome = fronteira.tag.rsplit("}", 1)[-1]
+            aneis = [_coordenadas_kml(e.text) for e in fronteira.iter()
+                     if e.tag.rsplit("}", 1)[-1] == "coordinates"]
+            if nome == "outerBoundaryIs" and aneis:
+                exterior = aneis[0]
+            elif nome == "innerBoundaryIs":
+                buracos.extend(aneis)
+        if exterior is not None:
+            yield exterior, buracos
+        elem.clear()
+
+
+def _ler_kmz(zf):
+    kml = next((n for n in zf.namelist() if n.lower().endswith(".kml")), None)
+    if kml is None:
+        raise ValueError("O arquivo .kmz não contém um .kml.")
+    with zf.open(kml) as f:
+        yield from ler_kml(f)
+
+
+# ----------------------------------------------------------------- entrada
+
+def ler_poligonos(nome_arquivo, arquivo):
+    """Escolhe o leitor pela extensão e gera (exterior, [buracos]) para cada polígono."""
+    ext = os.path.splitext(nome_arquivo)[1].lower().lstrip(".")
+    if ext in ("geojson", "json"):
+        return ler_geojson(arquivo)
+    if ext in ("geojsonl", "geojsons"):
+        return ler_geojson_seq(arquivo)
+    if ext == "shp":
+        return ler_shapefile(arquivo)
+    if ext == "kml":
+        return ler_kml(arquivo)
+    if ext in ("zip", "kmz"):
+        zf = zipfile.ZipFile(arquivo)
+        if ext == "kmz" or not any(n.lower().endswith(".shp") for n in zf.namelist()):
+            return _ler_kmz(zf)
+        return _ler_zip_shapefile(zf)
+    raise ValueError(f"Formato .{ext} não suportado.")
+
+
+def classificar(poligonos):
+    """Separa Rio e Ilhas: o maior polígono é o Rio; seus buracos e os polígonos dentro dele são Ilhas.
+
+    Retorna (rio, ilhas, ignorados), onde ``ignorados`` conta polígonos fora do rio.
+    """
+    poligonos = [(ext, buracos) for ext, buracos in poligonos if len(ext) >= 3]
+    if not poligonos:
+        return None, [], 0
+
+    i_rio = max(range(len(poligonos)), key=lambda i: abs(_area(poligonos[i][0])))
+    rio, ilhas = poligonos[i_rio]
+    ilhas = [b for b in ilhas if len(b) >= 3]
+    ignorados = 0
+    for i, (ext, _) in enumerate(poligonos):
+        if i == i_rio:
+            continue
+        if _contem(rio, ext[0, 0], ext[0, 1]):
+            ilhas.append(ext)
+        else:
+            ignorados += 1
+    return rio, ilhas, ignorados
+
+
+def importar_contornos(nome_arquivo, arquivo):
+    """Lê o arquivo e classifica os anéis; retorna (rio, ilhas, ignorados, erro)."""
+    try:
+        rio, ilhas, ignorados = classificar(ler_poligonos(nome_arquivo, arquivo))
+    except (ValueError, KeyError, TypeError, IndexError, AttributeError, zipfile.BadZipFile,
+            ElementTree.ParseError) as e:
+        return None, [], 0, f"Não foi possível ler {nome_arquivo}: {str(e)}"
+    if rio is None:
+        return None, [], 0, "Nenhum polígono encontrado no arquivo."
+    return rio, ilhas, ignorados, None
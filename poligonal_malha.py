@@ -0,0 +1,246 @@
+"""Exportação de malhas triangulares para VTU (VTK XML binário) e XDMF (HDF5 ou binário bruto).
+
+As funções recebem os nós (N x 2 ou N x 3, float64) e os triângulos (M x 3, índices a
+partir de 0) como arrays NumPy e gravam os buffers direto no arquivo, sem laços por
+elemento. Também lê malhas ASCII MSH 4.1 (como o GMSH.msh) para conversão.
+
+Uso na linha de comando:
+    python poligonal_malha.py GMSH.msh GMSH.vtu
+    python poligonal_malha.py GMSH.msh GMSH.xdmf
+"""
+import os
+import sys
+
+import numpy as np
+
+# Nós por elemento de cada tipo do gmsh (ponto, linha, triângulo, quadrilátero, ...)
+_NOS_POR_TIPO = {1: 2, 2: 3, 3: 4, 4: 4, 5: 8, 6: 6, 7: 5, 8: 3, 9: 6, 15: 1}
+
+_VTK_TRIANGULO = 5
+
+
+def _nos_3d(nos):
+    nos = np.asarray(nos, dtype="<f8")
+    if nos.ndim != 2 or nos.shape[1] not in (2, 3):
+        raise ValueError("Os nós devem ter forma N x 2 ou N x 3.")
+    if nos.shape[1] == 2:
+        nos = np.column_stack((nos, np.zeros(len(nos))))
+    return np.ascontiguousarray(nos)
+
+
+def _triangulos(triangulos):
+    triangulos = np.ascontiguousarray(triangulos, dtype="<i8")
+    if triangulos.ndim != 2 or triangulos.shape[1] != 3:
+        raise ValueError("Os triângulos devem ter forma M x 3.")
+    return triangulos
+
+
+# ----------------------------------------------------------------- leitura
+
+def _secao(texto, nome):
+    ini = texto.index(f"${nome}") + len(nome) + 1
+    fim = texto.index(f"$End{nome}", ini)
+    return np.array(texto[ini:fim].split(), dtype=np.float64)
+
+
+def ler_msh(arquivo):
+    """Lê uma malha ASCII MSH 4.1; retorna (nós N x 3, triângulos M x 3 com índices base 0).
+
+    Só há laço por bloco de entidade; nós e elementos de cada bloco são fatiados de uma vez.
+    """
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, "r", encoding="utf-8") as f:
+            texto = f.read()
+    else:
+        texto = arquivo.read()
+        if isinstance(texto, bytes):
+            texto = texto.decode("utf-8")
+
+    formato = texto[texto.index("$MeshFormat"):].split()[1:3]
+    if not formato[0].startswith("4") or formato[1] != "0":
+        raise ValueError("Apenas malhas MSH 4.x em ASCII são suportadas.")
+
+    t = _secao(texto, "Nodes")
+    n_blocos, max_tag = int(t[0]), int(t[3])
+    pos = 4
+    tags, coords = [], []
+    for _ in range(n_blocos):
+        dim, _, parametrico, n = (int(v) for v in t[pos:pos + 4])
+        pos += 4
+        tags.append(t[pos:pos + n].astype(np.int64))
+        pos += n
+        largura = 3 + (dim if parametrico else 0)
+        coords.append(t[pos:pos + n * largura].reshape(n, largura)[:, :3])
+        pos += n * largura
+    tags = np.concatenate(tags)
+    nos = np.ascontiguousarray(np.concatenate(coords))
+
+    indice = np.full(max_tag + 1, -1, dtype=np.int64)
+    indice[tags] = np.arange(len(tags))
+
+    t = _secao(texto, "Elements")
+    n_blocos = int(t[0])
+    pos = 4
+    triangulos = []
+    for _ in range(n_blocos):
+        _, _, tipo, n = (int(v) for v in t[pos:pos + 4])
+        pos += 4
+        largura = 1 + _NOS_POR_TIPO[tipo]
+        if tipo == 2:
+            triangulos.append(t[pos:pos + n * largura].reshape(n, largura)[:, 1:].astype(np.int64))
+        pos += n * largura
+
+    if not triangulos:
+        return nos, np.empty((0, 3), dtype=np.int64)
+    return nos, indice[np.concatenate(triangulos)]
+
+
+def arrays_gmsh(gmsh):
+    """Extrai (nós N x 3, triângulos M x 3) do modelo ativo na API do gmsh."""
+    tags, coords, _ = gmsh.model.mesh.getNodes()
+    tags = np.asarray(tags, dtype=np.int64)
+    nos = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+
+    _, nos_tri = gmsh.model.mesh.getElementsByType(2)
+    indice = np.full(int(tags.max()) + 1 if len(tags) else 1, -1, dtype=np.int64)
+    indice[tags] = np.arange(len(tags))
+    return nos, indice[np.asarray(nos_tri, dtype=np.int64).reshape(-1, 3)]
+
+
+# ----------------------------------------------------------------- VTU
+
+def escrever_vtu(arquivo, nos, triangulos):
+    """Grava a malha em VTU com dados binários anexados (``encoding="raw"``).
+
+    ``arquivo`` pode ser um caminho ou um objeto binário gravável; os arrays são
+    passados ao arquivo como memoryview, sem cópia intermediária.
+    """
+    nos = _nos_3d(nos)
+    triangulos = _triangulos(triangulos)
+    m = len(triangulos)
+    offsets = np.arange(3, 3 * m + 1, 3, dtype="<i8")
+    tipos = np.full(m, _VTK_TRIANGULO, dtype=np.uint8)
+
+    blocos = [nos, triangulos, offsets, tipos]
+    posicoes, pos = [], 0
+    for b in blocos:
+        posicoes.append(pos)
+        pos += 8 + b.nbytes
+
+    cabecalho = (
+        '<?xml version="1.0"?>\n'
+        '<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">\n'
+        '  <UnstructuredGrid>\n'
+        f'    <Piece NumberOfPoints="{len(nos)}" NumberOfCells="{m}">\n'
+        '      <Points>\n'
+        f'        <DataArray type="Float64" NumberOfComponents="3" format="appended" offset="{posicoes[0]}"/>\n'
+        '      </Points>\n'
+        '      <Cells>\n'
+        f'        <DataArray type="Int64" Name="connectivity" format="appended" offset="{posicoes[1]}"/>\n'
+        f'        <DataArray type="Int64" Name="offsets" format="appended" offset="{posicoes[2]}"/>\n'
+        f'        <DataArray type="UInt8" Name="types" format="appended" offset="{posicoes[3]}"/>\n'
+        '      </Cells>\n'
+        '    </Piece>\n'
+        '  </UnstructuredGrid>\n'
+        '  <AppendedData encoding="raw">\n'
+        '_'
+    ).encode("ascii")
+
+    def gravar(f):
+        f.write(cabecalho)
+        for b in blocos:
+            f.write(np.uint64(b.nbytes).tobytes())
+            f.write(memoryview(b).cast("B"))
+        f.write(b"\n  </AppendedData>\n</VTKFile>\n")
+
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, "wb") as f:
+            gravar(f)
+    else:
+        gravar(arquivo)
+
+
+# ----------------------------------------------------------------- XDMF
+
+def escrever_xdmf(caminho, nos, triangulos, formato="hdf"):
+    """Grava ``caminho`` (.xdmf) e os dados pesados ao lado dele.
+
+    ``formato="hdf"`` usa um .h5 (requer h5py); ``formato="binario"`` grava dois .bin
+    brutos little-endian, lidos pelo ParaView sem dependências extras. Retorna a lista
+    de arquivos criados.
+    """
+    nos = _nos_3d(nos)
+    triangulos = _triangulos(triangulos)
+    base = os.path.splitext(caminho)[0]
+    nome_base = os.path.basename(base)
+
+    if formato == "hdf":
+        try:
+            import h5py
+        except ImportError:
+            raise ValueError("Pacote h5py não instalado; use formato='binario'.")
+        caminho_h5 = base + ".h5"
+        with h5py.File(caminho_h5, "w") as h5:
+            h5.create_dataset("nos", data=nos)
+            h5.create_dataset("triangulos", data=triangulos)
+        item_nos = f'Format="HDF">{nome_base}.h5:/nos'
+        item_tri = f'Format="HDF">{nome_base}.h5:/triangulos'
+        criados = [caminho, caminho_h5]
+    elif formato == "binario":
+        caminho_nos, caminho_tri = base + "_nos.bin", base + "_triangulos.bin"
+        with open(caminho_nos, "wb") as f:
+            f.write(memoryview(nos).cast("B"))
+        with open(caminho_tri, "wb") as f:
+            f.write(memoryview(triangulos).cast("B"))
+        item_nos = f'Format="Binary" Endian="Little">{nome_base}_nos.bin'
+        item_tri = f'Format="Binary" Endian="Little">{nome_base}_triangulos.bin'
+        criados = [caminho, caminho_nos, caminho_tri]
+    else:
+        raise ValueError(f"Formato XDMF desconhecido: {formato}")
+
+    xdmf = (
+        '<?xml version="1.0" ?>\n'
+        '<Xdmf Version="3.0">\n'
+        '  <Domain>\n'
+        '    <Grid Name="malha" GridType="Uniform">\n'
+        f'      <Topology TopologyType="Triangle" NumberOfElements="{len(triangulos)}" NodesPerElement="3">\n'
+        f'        <DataItem Dimensions="{len(triangulos)} 3" NumberType="Int" Precision="8" {item_tri}</DataItem>\n'
+        '      </Topology>\n'
+        '      <Geometry GeometryType="XYZ">\n'
+        f'        <DataItem Dimensions="{len(nos)} 3" NumberType="Float" Precision="8" {item_nos}</DataItem>\n'
+        '      </Geometry>\n'
+        '    </Grid>\n'
+        '  </Domain>\n'
+        '</Xdmf>\n'
+    )
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(xdmf)
+    return criados
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(__doc__)
+        return 1
+
+    entrada, saida = argv
+    nos, triangulos = ler_msh(entrada)
+    if saida.lower().endswith(".vtu"):
+        escrever_vtu(saida, nos, triangulos)
+        criados = [saida]
+    elif saida.lower().endswith(".xdmf"):
+        try:
+            criados = escrever_xdmf(saida, nos, triangulos)
+        except ValueError:
+            criados = escrever_xdmf(saida, nos, triangulos, formato="binario")
+    else:
+        print("A saída deve terminar em .vtu ou .xdmf")
+        return 1
+
+    print(f"{len(nos)} nós, {len(triangulos)} triângulos -> {', '.join(criados)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Medição leve das fases de cada rerun dos apps (mapa, marcadores, st_folium, geocodificação, exportações).
+
+Cada sessão guarda um Medidor no ``st.session_state``: o app abre um rerun no início do
+script, envolve as fases com ``medidor.fase(nome)`` e fecha o rerun no fim. As durações
+são agregadas por sessão (contagem, média, p95, máximo) e aparecem na barra lateral
+quando a URL tem ``?debug=1``.
+
+Com a variável de ambiente POLIGONAL_LOG_FASES definida, cada rerun também vira uma
+linha JSON no log (``1``/``stderr`` para a saída de erro ou o caminho de um arquivo).
+A fase ``st_folium`` mede o lado do servidor: renderizar o HTML do mapa e enviá-lo ao navegador.
+"""
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import streamlit as st
+
+AMOSTRAS = 200  # Últimas durações guardadas por fase para o p95
+
+_logger = logging.getLogger("poligonal.fases")
+
+
+def _configurar_log():
+    destino = os.environ.get("POLIGONAL_LOG_FASES")
+    if not destino or _logger.handlers:
+        return
+    if destino in ("1", "stderr"):
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = logging.FileHandler(destino, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _logger.addHandler(handler)
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+
+
+_configurar_log()
+
+
+class Medidor:
+    """Durações das fases de uma sessão, acumuladas rerun a rerun."""
+
+    __slots__ = ("app", "sessao", "reruns", "_estatisticas", "_inicio", "_ultimo", "_atual")
+
+    def __init__(self, app, sessao=None):
+        self.app = app
+        self.sessao = sessao or uuid.uuid4().hex[:12]
+        self.reruns = 0
+        self._estatisticas = {}  # fase -> [n, soma, máximo, últimas durações]
+        self._inicio = None
+        self._ultimo = None
+        self._atual = {}
+
+    def iniciar_rerun(self):
+        """Começa um rerun; fecha antes o anterior se ele foi interrompido (st.rerun, st.stop, erro)."""
+        if self._inicio is not None:
+            self.finalizar_rerun(interrompido=True)
+        self._inicio = self._ultimo = time.perf_counter()
+        self._atual = {}
+
+    @contextmanager
+    def fase(self, nome):
+        """Soma a duração do bloco à fase ``nome`` do rerun atual."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._ultimo = time.perf_counter()
+            self._atual[nome] = self._atual.get(nome, 0.0) + self._ultimo - inicio
+
+    def finalizar_rerun(self, interrompido=False):
+        """Agrega as fases do rerun atual e emite a linha de log JSON."""
+        if self._inicio is None:
+            return
+        # Rerun interrompido: conta só até a última fase medida, não o tempo ocioso até o próximo
+        fim = self._ultimo if interrompido else time.perf_counter()
+        fases = dict(self._atual, rerun=fim - self._inicio)
+        for nome, segundos in fases.items():
+            estatistica = self._estatisticas.get(nome)
+            if estatistica is None:
+                estatistica = self._estatisticas[nome] = [0, 0.0, 0.0, deque(maxlen=AMOSTRAS)]
+            estatistica[0] += 1
+            estatistica[1] += segundos
+            estatistica[2] = max(estatistica[2], segundos)
+            estatistica[3].append(segundos)
+        self.reruns += 1
+        self._inicio = None
+        self._atual = {}
+
+        if _logger.isEnabledFor(logging.INFO):
+            _logger.info(json.dumps({
+                "evento": "rerun",
+                "app": self.app,
+                "sessao": self.sessao,
+                "rerun": self.reruns,
+                "interrompido": interrompido,
+                "ts": round(time.time(), 3),
+                "fases_ms": {nome: round(s * 1000, 2) for nome, s in fases.items()},
+            }))
+
+    def resumo(self):
+        """Linhas (uma por fase, ``rerun`` primeiro) com contagem, média, p95, máximo e último em ms."""
+        linhas = []
+        for nome, (n, soma, maximo, ultimas) in sorted(
+            self._estatisticas.items(), key=lambda item: (item[0] != "rerun", item[0])
+        ):
+            linhas.append({
+                "Fase": nome,
+                "N": n,
+                "Média": round(soma / n * 1000, 1),
+                "p95": round(float(np.percentile(ultimas, 95)) * 1000, 1),
+                "Máx": round(maximo * 1000, 1),
+                "Último": round(ultimas[-1] * 1000, 1),
+            })
+        return linhas
+
+
+def medidor_da_sessao(app):
+    """Medidor da sessão atual (criado no primeiro rerun), já com um novo rerun iniciado."""
+    if "medidor" not in st.session_state:
+        st.session_state.medidor = Medidor(app)
+    medidor = st.session_state.medidor
+    medidor.iniciar_rerun()
+    return medidor
+
+
+def encerrar_rerun(medidor):
+    """Fecha o rerun e, com ``?debug=1`` na URL, mostra os tempos da sessão na barra lateral."""
+    medidor.finalizar_rerun()
+    if st.query_params.get("debug") != "1":
+        return
+    with st.sidebar.expander("🐞 Tempos por fase (ms)", expanded=True):
+        st.caption(f"Sessão {medidor.sessao} · {medidor.reruns} rerun(s)")
+        st.table(medidor.resumo())
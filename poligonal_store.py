@@ -0,0 +1,303 @@
+import numpy as np
+
+from poligonal_core import escolher_projecao
+
+# Quantidade máxima de operações guardadas para desfazer/refazer
+LIMITE_HISTORICO = 1000
+# Bytes máximos do histórico: substituir/reiniciar/remover guardam cópias dos vértices e o
+# log entra no pickle do session_state a cada rerun (a operação mais recente é sempre mantida)
+LIMITE_BYTES_HISTORICO = 2 * 2 ** 20
+
+
+def _tamanho_op(op):
+    """Bytes aproximados de uma operação do log (arrays copiados + o próprio registro)."""
+    return 64 + sum(campo.nbytes for campo in op if isinstance(campo, np.ndarray))
+
+
+def _aneis_validos(aneis):
+    """Verifica se todos os anéis têm pelo menos 3 vértices (um Rio vazio quebra mapa e projeção)."""
+    return all(len(np.asarray(a).reshape(-1, 2)) >= 3 for a in aneis)
+
+
+def _empacotar(aneis):
+    """Concatena os anéis em um buffer único e calcula os offsets de cada um."""
+    aneis = [np.asarray(a, dtype=np.float64).reshape(-1, 2) for a in aneis]
+    offsets = np.zeros(len(aneis) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(a) for a in aneis])
+    coords = np.concatenate(aneis) if aneis else np.empty((0, 2), dtype=np.float64)
+    return coords, offsets
+
+
+class PoligonalStore:
+    """Armazena o rio, as ilhas e a poligonal em edição em um único buffer float64.
+
+    Os vértices ficam em ``_coords`` (linhas [lat, lon]) na ordem Rio, Ilha_1, ...,
+    Ilha_n e, por último, a poligonal em edição. ``_offsets[k]`` marca o início do
+    anel ``k``; o anel em edição começa em ``_offsets[_n_aneis]`` e vai até ``_n``.
+    Cada alteração é registrada no log de operações para desfazer/refazer. A projeção do
+    projeto é decidida uma vez, quando o Rio passa a existir (ver escolher_projecao).
+    """
+
+    __slots__ = ("_coords", "_n", "_offsets", "_n_aneis", "_log", "_bytes_log", "_cursor", "_projecao")
+
+    def __init__(self, capacidade=256):
+        self._coords = np.empty((max(capacidade, 1), 2), dtype=np.float64)
+        self._n = 0
+        self._offsets = np.zeros(16, dtype=np.int64)
+        self._n_aneis = 0
+        self._log = []
+        self._bytes_log = 0
+        self._cursor = 0
+        self._projecao = None
+
+    # ------------------------------------------------------------------ leitura
+
+    @property
+    def coordenadas(self):
+        """Vértices da poligonal em edição (view N x 2)."""
+        return self._coords[self._offsets[self._n_aneis]:self._n]
+
+    @property
+    def poligonal_principal(self):
+        """Vértices do rio (view N x 2) ou None se ainda não finalizado."""
+        return self.anel(0) if self._n_aneis else None
+
+    @property
+    def poligonais_secundarias(self):
+        """Lista com os vértices de cada ilha (views N x 2)."""
+        return [self.anel(k) for k in range(1, self._n_aneis)]
+
+    @property
+    def n_ilhas(self):
+        return max(self._n_aneis - 1, 0)
+
+    @property
+    def n_aneis(self):
+        """Quantidade de anéis finalizados (Rio + Ilhas)."""
+        return self._n_aneis
+
+    @property
+    def aneis(self):
+        """Lista com todos os anéis finalizados, Rio primeiro (views N x 2)."""
+        return [self.anel(k) for k in range(self._n_aneis)]
+
+    @property
+    def projecao(self):
+        """Projeção usada em todas as exportações do projeto; None enquanto não há Rio."""
+        return self._projecao
+
+    def anel(self, k):
+        """Retorna o anel finalizado ``k`` (0 = Rio, k = Ilha_k) como view N x 2."""
+        return self._coords[self._offsets[k]:self._offsets[k + 1]]
+
+    def contem(self, lat, lon):
+        """Verifica se o ponto já está na poligonal em edição."""
+        atual = self.coordenadas
+        return bool(np.any((atual[:, 0] == lat) & (atual[:, 1] == lon)))
+
+    @property
+    def pode_desfazer(self):
+        return self._cursor > 0
+
+    @property
+    def pode_refazer(self):
+        return self._cursor < len(self._log)
+
+    # ------------------------------------------------------------------ edição
+
+    def adicionar_ponto(self, lat, lon):
+        self._registrar(("ponto", float(lat), float(lon)))
+
+    def apagar_ultimo_ponto(self):
+        """Remove o último ponto da poligonal em edição; retorna False se não houver."""
+        atual = self.coordenadas
+        if not len(atual):
+            return False
+        lat, lon = atual[-1]
+        self._registrar(("apagar", float(lat), float(lon)))
+        return True
+
+    def finalizar_poligonal(self):
+        """Fecha a poligonal em edição como novo anel (Rio ou Ilha); exige 3 pontos."""
+        if len(self.coordenadas) < 3:
+            return False
+        self._registrar(("finalizar",))
+        return True
+
+    def remover_ultima_poligonal(self):
+        """Remove o último anel finalizado; retorna False se não houver."""
+        if not self._n_aneis:
+            return False
+        self._registrar(("remover", self.anel(self._n_aneis - 1).copy()))
+        return True
+
+    @classmethod
+    def a_partir_de(cls, aneis):
+        """Cria um store já com os ``aneis`` finalizados (Rio primeiro) e histórico vazio.
+
+        Lança ValueError se algum anel tiver menos de 3 vértices.
+        """
+        if not _aneis_validos(aneis):
+            raise ValueError("Todo anel precisa de pelo menos 3 vértices.")
+        store = cls(capacidade=sum(len(a) for a in aneis) + 256)
+        store._definir(*_empacotar(aneis))
+        store._atualizar_projecao()
+        return store
+
+    def substituir(self, aneis):
+        """Troca todas as poligonais por ``aneis`` (Rio primeiro) em uma única operação.
+
+        Retorna False, sem alterar nada, se algum anel tiver menos de 3 vértices.
+        """
+        if not _aneis_validos(aneis):
+            return False
+        coords, offsets = _empacotar(aneis)
+        self._registrar(("substituir", self._coords[:self._n].copy(),
+                         self._offsets[:self._n_aneis + 1].copy(), coords, offsets))
+        return True
+
+    def reiniciar(self):
+        """Apaga todas as poligonais (pode ser desfeito)."""
+        self._registrar(("reiniciar", self._coords[:self._n].copy(),
+                         self._offsets[:self._n_aneis + 1].copy()))
+
+    def desfazer(self):
+        """Desfaz a última operação; retorna o tipo dela ("ponto", "finalizar", ...) ou None."""
+        if not self.pode_desfazer:
+            return None
+        self._cursor -= 1
+        op = self._log[self._cursor]
+        self._reverter(op)
+        return op[0]
+
+    def refazer(self):
+        """Refaz a operação desfeita; retorna o tipo dela ou None se não houver."""
+        if not self.pode_refazer:
+            return None
+        op = self._log[self._cursor]
+        self._aplicar(op)
+        self._cursor += 1
+        return op[0]
+
+    # ------------------------------------------------------------------ internos
+
+    def _registrar(self, op):
+        # Uma nova operação descarta o que havia para refazer
+        self._bytes_log -= sum(_tamanho_op(o) for o in self._log[self._cursor:])
+        del self._log[self._cursor:]
+        self._aplicar(op)
+        self._log.append(op)
+        self._bytes_log += _tamanho_op(op)
+        # As operações mais antigas saem primeiro, por quantidade e por bytes
+        descartar = max(len(self._log) - LIMITE_HISTORICO, 0)
+        descartados = sum(_tamanho_op(o) for o in self._log[:descartar])
+        while descartar < len(self._log) - 1 and self._bytes_log - descartados > LIMITE_BYTES_HISTORICO:
+            descartados += _tamanho_op(self._log[descartar])
+            descartar += 1
+        self._bytes_log -= descartados
+        del self._log[:descartar]
+        self._cursor = len(self._log)
+
+    def _aplicar(self, op):
+        tipo, n_aneis = op[0], self._n_aneis
+        if tipo == "ponto":
+            self._inserir(self._n, np.array([[op[1], op[2]]]))
+        elif tipo == "apagar":
+            self._n -= 1
+        elif tipo == "finalizar":
+            self._fechar_anel()
+        elif tipo == "remover":
+            ini, fim = self._offsets[self._n_aneis - 1], self._offsets[self._n_aneis]
+            self._excluir(ini, fim)
+            self._n_aneis -= 1
+        elif tipo == "reiniciar":
+            self._n = 0
+            self._n_aneis = 0
+        elif tipo == "substituir":
+            self._definir(op[3], op[4])
+        self._depois_de(tipo, n_aneis)
+
+    def _reverter(self, op):
+        tipo, n_aneis = op[0], self._n_aneis
+        if tipo == "ponto":
+            self._n -= 1
+        elif tipo == "apagar":
+            self._inserir(self._n, np.array([[op[1], op[2]]]))
+        elif tipo == "finalizar":
+            self._n_aneis -= 1
+        elif tipo == "remover":
+            self._inserir_anel(op[1])
+        elif tipo in ("reiniciar", "substituir"):
+            self._definir(op[1], op[2])
+        self._depois_de(tipo, n_aneis)
+
+    def _depois_de(self, tipo, n_aneis_antes):
+        # O Rio só muda quando o primeiro anel entra ou sai, ou quando tudo é trocado
+        if tipo in ("reiniciar", "substituir") or (n_aneis_antes == 0) != (self._n_aneis == 0):
+            self._atualizar_projecao()
+
+    def _atualizar_projecao(self):
+        self._projecao = escolher_projecao(self.anel(0)) if self._n_aneis else None
+
+    def _definir(self, coords, offsets):
+        self._n = 0
+        self._inserir(0, coords)
+        self._garantir_aneis(len(offsets))
+        self._offsets[:len(offsets)] = offsets
+        self._n_aneis = len(offsets) - 1
+
+    def _inserir_anel(self, pontos):
+        # O anel entra antes da poligonal em edição, que continua no fim do buffer
+        self._inserir(self._offsets[self._n_aneis], pontos)
+        self._garantir_aneis(self._n_aneis + 2)
+        self._offsets[self._n_aneis + 1] = self._offsets[self._n_aneis] + len(pontos)
+        self._n_aneis += 1
+
+    def _fechar_anel(self):
+        self._garantir_aneis(self._n_aneis + 2)
+        self._n_aneis += 1
+        self._offsets[self._n_aneis] = self._n
+
+    def _inserir(self, pos, pontos):
+        m = len(pontos)
+        self._garantir_vertices(self._n + m)
+        self._coords[pos + m:self._n + m] = self._coords[pos:self._n]
+        self._coords[pos:pos + m] = pontos
+        self._n += m
+
+    def _excluir(self, ini, fim):
+        m = fim - ini
+        self._coords[ini:self._n - m] = self._coords[fim:self._n]
+        self._n -= m
+
+    def _garantir_vertices(self, n):
+        if n > len(self._coords):
+            novo = np.empty((max(n, 2 * len(self._coords)), 2), dtype=np.float64)
+            novo[:self._n] = self._coords[:self._n]
+            self._coords = novo
+
+    def _garantir_aneis(self, n):
+        if n > len(self._offsets):
+            novo = np.zeros(max(n, 2 * len(self._offsets)), dtype=np.int64)
+            novo[:self._n_aneis + 1] = self._offsets[:self._n_aneis + 1]
+            self._offsets = novo
+
+    # ------------------------------------------------------------------ pickle
+
+    def __getstate__(self):
+        # Só a parte ocupada dos buffers é serializada a cada rerun
+        return (self._coords[:self._n].copy(), self._offsets[:self._n_aneis + 1].copy(),
+                self._log, self._cursor)
+
+    def __setstate__(self, estado):
+        coords, offsets, log, cursor = estado
+        self._coords = np.empty((max(len(coords), 1), 2), dtype=np.float64)
+        self._coords[:len(coords)] = coords
+        self._n = len(coords)
+        self._offsets = np.zeros(max(len(offsets), 2), dtype=np.int64)
+        self._offsets[:len(offsets)] = offsets
+        self._n_aneis = len(offsets) - 1
+        self._log = log
+        self._bytes_log = sum(_tamanho_op(op) for op in log)
+        self._cursor = cursor
+        self._atualizar_projecao()